@@ -0,0 +1,281 @@
+# alerts.py
+"""Table-driven weather alert rules.
+
+Many readings are evaluated at once with NumPy (evaluate); a single reading,
+as on every search or refresh in the UI, takes a plain-Python path over the
+same rule table (match), which avoids array setup costs. NumPy is only
+imported once a batch is evaluated, so the UI never loads it.
+"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from conditions import MIST, RAIN, SNOW, THUNDERSTORM, classify
+from models import WeatherReading
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Columns of the numeric input matrix
+FIELDS = ("temp", "humidity", "wind_speed")
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    """One alert: a numeric range or a set of condition categories."""
+
+    code: str
+    group: str  # rules sharing a group are exclusive; the first match wins
+    level: str
+    icon: str
+    title: str
+    message: str  # may use {temp}, {humidity} and {wind_speed}
+    recommendation: str
+    field: Optional[str] = None
+    minimum: float = float("-inf")  # inclusive
+    maximum: float = float("inf")  # inclusive
+    conditions: Tuple[int, ...] = ()  # categories from conditions.py
+
+
+# Thresholds assume metric units (°C, m/s), as requested by the service
+ALERT_RULES: Tuple[AlertRule, ...] = (
+    # Temperature alerts
+    AlertRule(
+        "extreme_heat", "temperature", "danger", "🔥", "Extreme Heat Warning",
+        "Very high temperature! Stay hydrated and avoid prolonged sun exposure.",
+        "Wear sunscreen, drink plenty of water, and stay in shade.",
+        field="temp", minimum=35,
+    ),
+    AlertRule(
+        "high_temperature", "temperature", "warning", "☀️", "High Temperature",
+        "It's quite hot outside.",
+        "Wear light clothing and apply sunscreen.",
+        field="temp", minimum=30,
+    ),
+    AlertRule(
+        "freezing", "temperature", "danger", "🥶", "Freezing Temperature",
+        "Temperature below freezing!",
+        "Dress in layers, wear warm clothing and watch for ice.",
+        field="temp", maximum=0,
+    ),
+    AlertRule(
+        "cold", "temperature", "warning", "❄️", "Cold Weather",
+        "It's quite cold outside.",
+        "Wear warm clothes and a jacket.",
+        field="temp", maximum=5,
+    ),
+    # Weather condition alerts
+    AlertRule(
+        "thunderstorm", "condition", "danger", "⚡", "Thunderstorm Alert",
+        "Thunderstorm in the area!",
+        "Stay indoors and avoid open areas. Unplug electronics.",
+        conditions=(THUNDERSTORM,),
+    ),
+    AlertRule(
+        "rain", "condition", "info", "☔", "Rain Expected",
+        "Rainy conditions.",
+        "Bring an umbrella and wear waterproof clothing.",
+        conditions=(RAIN,),
+    ),
+    AlertRule(
+        "snow", "condition", "warning", "🌨️", "Snow Alert",
+        "Snowy conditions expected.",
+        "Drive carefully and dress warmly. Watch for slippery roads.",
+        conditions=(SNOW,),
+    ),
+    # Wind alerts
+    AlertRule(
+        "high_wind", "wind", "warning", "💨", "High Wind Warning",
+        "Strong winds at {wind_speed} m/s!",
+        "Secure loose objects and be cautious outdoors.",
+        field="wind_speed", minimum=15,
+    ),
+    # Humidity alerts
+    AlertRule(
+        "high_humidity", "humidity", "info", "💧", "High Humidity",
+        "Humidity at {humidity}%.",
+        "It may feel warmer than actual temperature. Stay hydrated.",
+        field="humidity", minimum=80,
+    ),
+    # Fog/mist alerts
+    AlertRule(
+        "low_visibility", "visibility", "warning", "🌫️", "Low Visibility",
+        "Foggy conditions reduce visibility.",
+        "Drive slowly and use fog lights if driving.",
+        conditions=(MIST,),
+    ),
+)
+
+ALERT_CODES = tuple(rule.code for rule in ALERT_RULES)
+RULES_BY_CODE = {rule.code: rule for rule in ALERT_RULES}
+
+
+class AlertEngine:
+    """Compiles alert rules into arrays and scores many readings per call."""
+
+    def __init__(self, rules: Sequence[AlertRule] = ALERT_RULES):
+        self.rules = tuple(rules)
+        self.codes = tuple(rule.code for rule in self.rules)
+        self._compiled = False
+
+    def _compile(self):
+        """Build the arrays used by evaluate() (first batch only)."""
+        import numpy as np
+
+        numeric = [i for i, r in enumerate(self.rules) if r.field is not None]
+        self._numeric_columns = np.array(numeric, dtype=np.intp)
+        self._numeric_fields = np.array(
+            [FIELDS.index(self.rules[i].field) for i in numeric], dtype=np.intp
+        )
+        self._minimum = np.array([self.rules[i].minimum for i in numeric], dtype=float)
+        self._maximum = np.array([self.rules[i].maximum for i in numeric], dtype=float)
+
+        self._condition_rules = [
+            (i, np.array(rule.conditions))
+            for i, rule in enumerate(self.rules)
+            if rule.conditions
+        ]
+
+        # Exclusive groups as lists of rule columns, in priority order
+        groups: Dict[str, List[int]] = {}
+        for i, rule in enumerate(self.rules):
+            groups.setdefault(rule.group, []).append(i)
+        self._exclusive = [cols for cols in groups.values() if len(cols) > 1]
+        self._compiled = True
+
+    def evaluate(
+        self,
+        temp,
+        humidity,
+        wind_speed,
+        conditions,
+    ) -> "np.ndarray":
+        """
+        Evaluate every rule against every row in one vectorized pass.
+
+        Args:
+            temp: Temperatures (°C), one per row
+            humidity: Relative humidity (%), one per row
+            wind_speed: Wind speeds (m/s), one per row
+            conditions: Condition categories (see conditions.classify),
+                one per row
+
+        Returns:
+            Boolean matrix of shape (rows, rules); column j is self.codes[j]
+        """
+        import numpy as np
+
+        if not self._compiled:
+            self._compile()
+        values = np.column_stack([
+            np.asarray(temp, dtype=float),
+            np.asarray(humidity, dtype=float),
+            np.asarray(wind_speed, dtype=float),
+        ])
+        rows = len(values)
+        matches = np.zeros((rows, len(self.rules)), dtype=bool)
+
+        # Numeric ranges: (rows, numeric rules) comparisons via broadcasting
+        selected = values[:, self._numeric_fields]
+        matches[:, self._numeric_columns] = (
+            (selected >= self._minimum) & (selected <= self._maximum)
+        )
+
+        # Conditions: one membership test per rule over all rows
+        categories = np.asarray(conditions, dtype=np.int64)
+        for column, wanted in self._condition_rules:
+            matches[:, column] = np.isin(categories, wanted)
+
+        # Within an exclusive group only the first matching rule survives
+        for columns in self._exclusive:
+            taken = np.zeros(rows, dtype=bool)
+            for column in columns:
+                matches[:, column] &= ~taken
+                taken |= matches[:, column]
+
+        return matches
+
+    def match(self, temp: float, humidity: float, wind_speed: float,
+              condition: int) -> List[int]:
+        """
+        Evaluate the rules for one reading, without NumPy.
+
+        Gives the same result as a row of evaluate(), for a fraction of
+        the cost when there is only one row.
+
+        Returns:
+            Indexes of the matching rules (into self.rules), in rule order
+        """
+        values = {"temp": temp, "humidity": humidity, "wind_speed": wind_speed}
+        taken = set()  # groups that already have a match
+        matched = []
+        for i, rule in enumerate(self.rules):
+            if rule.group in taken:
+                continue
+            if rule.field is not None:
+                value = values[rule.field]
+                hit = rule.minimum <= value <= rule.maximum
+            else:
+                hit = condition in rule.conditions
+            if hit:
+                taken.add(rule.group)
+                matched.append(i)
+        return matched
+
+    def evaluate_readings(self, readings: Sequence[WeatherReading]) -> "np.ndarray":
+        """Evaluate the rules for a batch of WeatherReading records."""
+        import numpy as np
+
+        n = len(readings)
+        return self.evaluate(
+            np.fromiter((r.temp for r in readings), float, n),
+            np.fromiter((r.humidity for r in readings), float, n),
+            np.fromiter((r.wind_speed for r in readings), float, n),
+            np.fromiter(
+                (classify(r.condition_id, r.icon, r.description) for r in readings),
+                np.int64,
+                n,
+            ),
+        )
+
+    def codes_for(self, matches: "np.ndarray") -> List[Tuple[str, ...]]:
+        """Turn a match matrix into a tuple of alert codes per row."""
+        import numpy as np
+
+        codes = self.codes
+        return [tuple(codes[j] for j in np.flatnonzero(row)) for row in matches]
+
+    def alerts_for(self, reading: WeatherReading, description: str) -> List[Dict]:
+        """
+        Build the alert dictionaries shown by the UI for one reading.
+
+        Args:
+            reading: Current weather
+            description: Weather description, used if the reading has no
+                condition ID or icon
+
+        Returns:
+            List of alerts with level, icon, title, message and recommendation
+        """
+        category = classify(reading.condition_id, reading.icon, description)
+        matched = self.match(reading.temp, reading.humidity, reading.wind_speed, category)
+        values = {
+            "temp": reading.temp,
+            "humidity": reading.humidity,
+            "wind_speed": reading.wind_speed,
+        }
+        alerts = []
+        for j in matched:
+            rule = self.rules[j]
+            alerts.append({
+                "level": rule.level,
+                "icon": rule.icon,
+                "title": rule.title,
+                "message": rule.message.format(**values),
+                "recommendation": rule.recommendation,
+            })
+        return alerts
+
+
+# Shared engine for the default rule table
+DEFAULT_ENGINE = AlertEngine()
@@ -0,0 +1,130 @@
+# benchmark.py
+"""Offline load benchmark for WeatherService against the fake OWM server.
+
+Drives N lookups at a given concurrency and reports latency percentiles and
+throughput. No network access or API key is needed.
+
+    python benchmark.py --requests 2000 --concurrency 50 --cities 200
+    python benchmark.py --error-rate 0.1 --rate-limit-rate 0.05 --no-cache
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+# Benchmarks must not need a real key or touch the on-disk cache
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+os.environ.setdefault("WEATHER_CACHE_DB", "")
+
+from cache import TTLCache
+from config import Config
+from metrics import REGISTRY
+from fake_owm_server import (
+    BackgroundServer,
+    add_settings_arguments,
+    settings_from_args,
+)
+from weather_service import WeatherService, WeatherServiceError
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_benchmark(base_url: str, args: argparse.Namespace) -> dict:
+    """Run the load and collect per-request latencies."""
+    cache = TTLCache(0 if args.no_cache else Config.CACHE_TTL, Config.CACHE_MAX_ENTRIES)
+    service = WeatherService(cache=cache)
+    service.base_url = base_url
+
+    cities = [f"City{i}" for i in range(args.cities)]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await service.get_weather(cities[i % len(cities)])
+            except WeatherServiceError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    async with service:
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": args.requests,
+        "errors": errors,
+        "elapsed": elapsed,
+        "throughput": args.requests / elapsed if elapsed else 0.0,
+        "mean": statistics.fmean(latencies) if latencies else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "cache": cache.stats(),
+        "breaker": service.breaker.state,
+    }
+
+
+def print_report(result: dict, upstream: dict):
+    """Print a short human-readable summary."""
+    print("WeatherService benchmark")
+    print("=" * 50)
+    print(f"Requests:     {result['requests']} ({result['errors']} errors)")
+    print(f"Elapsed:      {result['elapsed']:.3f} s")
+    print(f"Throughput:   {result['throughput']:.1f} req/s")
+    print(f"Latency mean: {result['mean'] * 1000:.2f} ms")
+    print(f"Latency p50:  {result['p50'] * 1000:.2f} ms")
+    print(f"Latency p95:  {result['p95'] * 1000:.2f} ms")
+    print(f"Latency p99:  {result['p99'] * 1000:.2f} ms")
+    print(f"Cache:        {result['cache']}")
+    print(f"Breaker:      {result['breaker']}")
+    if upstream:
+        print(f"Upstream:     {upstream}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000,
+                        help="total lookups to issue (default: 1000)")
+    parser.add_argument("--concurrency", type=int, default=20,
+                        help="lookups in flight at once (default: 20)")
+    parser.add_argument("--cities", type=int, default=100,
+                        help="distinct city names to cycle through (default: 100)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="disable the in-memory response cache")
+    parser.add_argument("--metrics", action="store_true",
+                        help="also dump the service metrics (Prometheus text)")
+    parser.add_argument("--url", default=None,
+                        help="benchmark an already running server instead")
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    if args.url:
+        result = asyncio.run(run_benchmark(args.url, args))
+        upstream = {}
+    else:
+        with BackgroundServer(settings_from_args(args)) as server:
+            result = asyncio.run(run_benchmark(server.base_url, args))
+            upstream = {"requests": server.requests, "status": server.status_counts}
+    print_report(result, upstream)
+
+    if args.metrics:
+        print()
+        print(REGISTRY.to_prometheus(), end="")
+
+
+if __name__ == "__main__":
+    main()
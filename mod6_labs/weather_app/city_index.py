@@ -0,0 +1,245 @@
+# city_index.py
+"""Local city name index for as-you-type suggestions.
+
+Names are kept in one sorted list so a prefix search is two bisects and a
+slice. Misspellings are matched with difflib, restricted to names that
+share the first letter so the fuzzy pass stays small. A CityOverlay puts a
+user's own cities on top of one shared, read-only index, so many sessions
+can use the same city list without copying it.
+"""
+
+import bisect
+import difflib
+import gzip
+import json
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Union
+
+
+class City(NamedTuple):
+    """One entry of the OpenWeatherMap city list (id 0 if unknown)."""
+
+    id: int
+    name: str
+    country: str = ""
+    state: str = ""
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+
+    @property
+    def label(self) -> str:
+        """Name as shown in the suggestions, e.g. "London, GB"."""
+        parts = [self.name, self.state, self.country]
+        return ", ".join(part for part in parts if part)
+
+    @property
+    def query(self) -> str:
+        """Value for the API's q parameter, e.g. "London,GB"."""
+        parts = [self.name, self.state, self.country]
+        return ",".join(part for part in parts if part)
+
+
+def normalize(name: str) -> str:
+    """Case-, accent- and whitespace-insensitive form of a city name."""
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.split())
+
+
+def read_city_list(path: Union[str, Path]) -> List[City]:
+    """
+    Read OpenWeatherMap's city list (city.list.json, optionally gzipped).
+
+    Args:
+        path: Path to the JSON file; a ".gz" suffix is decompressed
+
+    Returns:
+        List of cities in file order
+    """
+    path = Path(path)
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        entries = json.load(f)
+
+    cities = []
+    for entry in entries:
+        coord = entry.get("coord") or {}
+        cities.append(City(
+            id=entry.get("id", 0),
+            name=entry.get("name", ""),
+            country=entry.get("country", ""),
+            state=entry.get("state", ""),
+            lat=coord.get("lat"),
+            lon=coord.get("lon"),
+        ))
+    return cities
+
+
+class CityIndex:
+    """
+    Sorted index of city names supporting prefix and fuzzy search.
+
+    Searches may run in worker threads while add() runs on the UI side.
+    add() never changes the lists in place: it builds new ones and swaps
+    them in under a lock, and readers work on the lists they started with.
+    """
+
+    def __init__(self, cities: Iterable[City] = ()):
+        pairs = sorted(
+            ((normalize(city.name), city) for city in cities if city.name),
+            key=lambda pair: pair[0],
+        )
+        # (sorted normalized names, cities in the same order), replaced whole
+        self._entries = ([key for key, _ in pairs], [city for _, city in pairs])
+        self._recent = {}  # normalized name -> City, searched by the user
+        self._lock = threading.Lock()  # serializes add()
+
+    def __len__(self) -> int:
+        return len(self._entries[0])
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "CityIndex":
+        """Build an index from the OpenWeatherMap city list file."""
+        return cls(read_city_list(path))
+
+    def add(self, city: Union[City, str]):
+        """Add a city (e.g. from the search history) to the index."""
+        if isinstance(city, str):
+            city = City(0, city)
+        key = normalize(city.name)
+        if not key:
+            return
+        with self._lock:
+            recent = dict(self._recent)
+            recent[key] = city
+            self._recent = recent
+            if key not in self:
+                keys, cities = self._entries
+                position = bisect.bisect_right(keys, key)
+                self._entries = (
+                    keys[:position] + [key] + keys[position:],
+                    cities[:position] + [city] + cities[position:],
+                )
+
+    def __contains__(self, name: str) -> bool:
+        key = normalize(name)
+        keys = self._entries[0]
+        position = bisect.bisect_left(keys, key)
+        return position < len(keys) and keys[position] == key
+
+    @staticmethod
+    def _range(keys: List[str], prefix: str):
+        """Slice bounds of the keys starting with a normalized prefix."""
+        start = bisect.bisect_left(keys, prefix)
+        # U+FFFF sorts after any character a city name can contain
+        end = bisect.bisect_left(keys, prefix + "\uffff", start)
+        return start, end
+
+    @staticmethod
+    def _lookup(keys: List[str], cities: List[City], key: str) -> List[City]:
+        start = bisect.bisect_left(keys, key)
+        end = bisect.bisect_right(keys, key, start)
+        return cities[start:end]
+
+    def lookup(self, name: str) -> List[City]:
+        """All cities with exactly this name (e.g. every "Springfield")."""
+        keys, cities = self._entries
+        return self._lookup(keys, cities, normalize(name))
+
+    def search(self, text: str, limit: int = 8, fuzzy: bool = True) -> List[City]:
+        """
+        Suggest cities for what the user has typed so far.
+
+        Recently searched cities come first, then prefix matches; if that
+        yields fewer than `limit` cities, close misspellings are added.
+
+        Args:
+            text: Partial city name
+            limit: Maximum number of suggestions
+            fuzzy: Whether to fall back to fuzzy matching
+
+        Returns:
+            Up to `limit` cities, best matches first
+        """
+        query = normalize(text)
+        if not query:
+            return []
+
+        # One consistent snapshot for the whole search
+        keys, cities = self._entries
+        recent = self._recent
+
+        results = [city for key, city in recent.items() if key.startswith(query)]
+        results = results[:limit]
+        seen = set(results)
+
+        start, end = self._range(keys, query)
+        for i in range(start, end):
+            if len(results) >= limit:
+                return results
+            city = cities[i]
+            if city not in seen:
+                seen.add(city)
+                results.append(city)
+
+        if fuzzy and len(query) >= 3 and len(results) < limit:
+            # Assume the first letter is right, which keeps the candidate
+            # set to a small slice of the sorted keys
+            first, last = self._range(keys, query[0])
+            candidates = dict.fromkeys(keys[first:last])
+            for key in difflib.get_close_matches(query, candidates, n=limit, cutoff=0.75):
+                for city in self._lookup(keys, cities, key):
+                    if len(results) >= limit:
+                        return results
+                    if city not in seen:
+                        seen.add(city)
+                        results.append(city)
+        return results
+
+
+class CityOverlay:
+    """
+    A user's recently searched cities on top of a shared CityIndex.
+
+    The base index is never modified, so one copy of the city list can
+    serve every session; add() only touches the small per-user index.
+    """
+
+    def __init__(self, base: Optional[CityIndex] = None):
+        self.base = base if base is not None else CityIndex()
+        self.local = CityIndex()
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.local)
+
+    def add(self, city: Union[City, str]):
+        """Add a city (e.g. from the search history) for this user."""
+        self.local.add(city)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.local or name in self.base
+
+    def lookup(self, name: str) -> List[City]:
+        """All cities with exactly this name, the user's own first."""
+        results = self.local.lookup(name)
+        seen = set(results)
+        return results + [city for city in self.base.lookup(name) if city not in seen]
+
+    def search(self, text: str, limit: int = 8, fuzzy: bool = True) -> List[City]:
+        """Suggestions as in CityIndex.search, the user's own cities first."""
+        # Take the base reference once; it may be swapped in meanwhile
+        base = self.base
+        results = self.local.search(text, limit, fuzzy=False)
+        seen = set(results)
+        for index in (base, self.local) if fuzzy else (base,):
+            if len(results) >= limit:
+                break
+            for city in index.search(text, limit, fuzzy):
+                if len(results) >= limit:
+                    break
+                if city not in seen:
+                    seen.add(city)
+                    results.append(city)
+        return results
@@ -0,0 +1,124 @@
+# conditions.py
+"""Classification of OpenWeatherMap conditions into display categories.
+
+Shared by the theme lookup (themes.py) and the alert rules (alerts.py).
+Condition IDs and icon codes are resolved through precomputed tables; free
+text is only used as a fallback, through a single compiled regex.
+"""
+
+import re
+from functools import lru_cache
+
+# Condition categories (small ints so they can be stored in arrays)
+OTHER = 0
+CLEAR = 1
+FEW_CLOUDS = 2
+CLOUDS = 3
+RAIN = 4
+THUNDERSTORM = 5
+SNOW = 6
+MIST = 7  # mist and fog
+HAZE = 8
+
+CATEGORY_NAMES = (
+    "other",
+    "clear",
+    "few_clouds",
+    "clouds",
+    "rain",
+    "thunderstorm",
+    "snow",
+    "mist",
+    "haze",
+)
+
+
+def _build_id_table():
+    """Map every condition ID (0-999) to a category."""
+    table = [OTHER] * 1000
+    for code in range(200, 300):
+        table[code] = THUNDERSTORM
+    for code in range(300, 400):
+        table[code] = RAIN  # drizzle
+    for code in range(500, 600):
+        table[code] = RAIN
+    # All of 6xx, including sleet (611-613) and rain and snow (615-616),
+    # which OWM also gives the snow icon. Matching on the text used to show
+    # sleet with the default theme and no alert, and rain and snow as rain;
+    # both now get the snow theme and the Snow Alert, on purpose.
+    for code in range(600, 700):
+        table[code] = SNOW
+    table[701] = MIST
+    table[741] = MIST  # fog
+    table[721] = HAZE
+    table[800] = CLEAR
+    table[801] = FEW_CLOUDS
+    for code in (802, 803, 804):
+        table[code] = CLOUDS
+    return tuple(table)
+
+
+# Indexed by OWM condition ID, see https://openweathermap.org/weather-conditions
+CATEGORY_BY_ID = _build_id_table()
+
+# Icon codes without the day/night suffix
+CATEGORY_BY_ICON = {
+    "01": CLEAR,
+    "02": FEW_CLOUDS,
+    "03": CLOUDS,
+    "04": CLOUDS,
+    "09": RAIN,
+    "10": RAIN,
+    "11": THUNDERSTORM,
+    "13": SNOW,
+    "50": MIST,
+}
+
+# One pass over the text; alternatives are tried in priority order and the
+# matching empty named group tells which category won
+_TEXT_PATTERN = re.compile(
+    r"(?=.*(?:clear|sun))(?P<clear>)"
+    r"|(?=.*few)(?=.*cloud)(?P<few_clouds>)"
+    r"|(?=.*cloud)(?P<clouds>)"
+    r"|(?=.*(?:thunder|storm))(?P<thunderstorm>)"
+    r"|(?=.*(?:rain|drizzle))(?P<rain>)"
+    r"|(?=.*snow)(?P<snow>)"
+    r"|(?=.*(?:mist|fog))(?P<mist>)"
+    r"|(?=.*haze)(?P<haze>)",
+    re.IGNORECASE | re.DOTALL,
+)
+_CATEGORY_BY_NAME = {name: i for i, name in enumerate(CATEGORY_NAMES)}
+
+
+@lru_cache(maxsize=256)
+def classify_text(description: str) -> int:
+    """Classify a free-text description (fallback when no ID is known)."""
+    match = _TEXT_PATTERN.match(description)
+    if match is None:
+        return OTHER
+    return _CATEGORY_BY_NAME[match.lastgroup]
+
+
+def classify(condition_id: int = 0, icon: str = "", description: str = "") -> int:
+    """
+    Return the condition category for a reading.
+
+    The condition ID is preferred, then the icon code, then the text.
+
+    Args:
+        condition_id: OWM condition ID (0 if unknown)
+        icon: OWM icon code such as "10d" ("" if unknown)
+        description: Weather description
+
+    Returns:
+        One of the category constants in this module
+    """
+    if 0 < condition_id < 1000:
+        return CATEGORY_BY_ID[condition_id]
+    if icon:
+        category = CATEGORY_BY_ICON.get(icon[:2])
+        if category is not None:
+            return category
+    if description:
+        return classify_text(description)
+    return OTHER
@@ -1,21 +1,99 @@
 # config.py
-"""Configuration management for the Weather App."""
+"""Configuration management for the Weather App.
+
+Settings that come from the environment (or a .env file) are resolved
+lazily on first access and cached, so importing this module never touches
+the filesystem or fails without an API key. Call Config.validate() where
+the settings are actually needed and Config.reload() to pick up changes.
+Variables set in the real environment always take precedence over .env.
+"""
 
 import os
-from dotenv import load_dotenv
+from dotenv import dotenv_values, find_dotenv
+
+
+def _settings_from_env():
+    """Read the environment-backed settings."""
+    return {
+        # API Configuration
+        "API_KEY": os.getenv("OPENWEATHER_API_KEY", ""),
+        "BASE_URL": os.getenv(
+            "OPENWEATHER_BASE_URL", 
+            "https://api.openweathermap.org/data/2.5/weather"
+        ),
+        "FORECAST_URL": os.getenv(
+            "OPENWEATHER_FORECAST_URL",
+            "https://api.openweathermap.org/data/2.5/forecast"
+        ),
+        "ONECALL_URL": os.getenv(
+            "OPENWEATHER_ONECALL_URL",
+            "https://api.openweathermap.org/data/3.0/onecall"
+        ),
+        "GROUP_URL": os.getenv(
+            "OPENWEATHER_GROUP_URL",
+            "https://api.openweathermap.org/data/2.5/group"
+        ),
+        
+        # Connection pool settings (shared client reused across requests)
+        "MAX_CONNECTIONS": int(os.getenv("OPENWEATHER_MAX_CONNECTIONS", "20")),
+        "MAX_KEEPALIVE_CONNECTIONS": int(
+            os.getenv("OPENWEATHER_MAX_KEEPALIVE_CONNECTIONS", "10")
+        ),
+        "HTTP2": os.getenv("OPENWEATHER_HTTP2", "1") == "1",
+        
+        # Response cache (OpenWeatherMap updates roughly every 10 minutes)
+        "CACHE_TTL": int(os.getenv("WEATHER_CACHE_TTL", "600")),  # seconds
+        "CACHE_MAX_ENTRIES": int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "256")),
+        
+        # Retries for timeouts, network errors, 429 and 5xx responses
+        "MAX_RETRIES": int(os.getenv("WEATHER_MAX_RETRIES", "2")),
+        
+        # On-disk store of the last known weather ("" disables it)
+        "CACHE_DB": os.getenv("WEATHER_CACHE_DB", "weather_cache.db"),
+        
+        # Background refresh of the displayed city and the watch list
+        "REFRESH_INTERVAL": int(os.getenv("WEATHER_REFRESH_INTERVAL", "600")),  # seconds
+        "REFRESH_JITTER": float(os.getenv("WEATHER_REFRESH_JITTER", "0.1")),  # +/- fraction
+        "REFRESH_CONCURRENCY": int(os.getenv("WEATHER_REFRESH_CONCURRENCY", "4")),
+        "WATCH_LIST": [
+            city.strip()
+            for city in os.getenv("WEATHER_WATCH_LIST", "").split(",")
+            if city.strip()
+        ],
+        
+        # Per-user history/preferences in server (web) mode
+        "SESSION_DB": os.getenv("WEATHER_SESSION_DB", "weather_sessions.db"),
+        "SERVER_PORT": int(os.getenv("WEATHER_SERVER_PORT", "8550")),
+        
+        # Worker processes for batch post-processing (0 runs it inline)
+        "POSTPROCESS_WORKERS": int(os.getenv("WEATHER_POSTPROCESS_WORKERS", "0")),
+        
+        # Search history size (entries beyond this are dropped, oldest first)
+        "HISTORY_MAX": int(os.getenv("WEATHER_HISTORY_MAX", "1000")),
+        
+        # OpenWeatherMap city list for suggestions (json or json.gz, optional)
+        "CITY_LIST_FILE": os.getenv("WEATHER_CITY_LIST", "city.list.json.gz"),
+    }
+
+
+class _LazyConfig(type):
+    """Metaclass that resolves environment-backed settings on demand."""
+    
+    def __getattr__(cls, name):
+        settings = cls._load()
+        try:
+            return settings[name]
+        except KeyError:
+            raise AttributeError(
+                f"type object 'Config' has no attribute '{name}'"
+            ) from None
 
-# Load environment variables from .env file
-load_dotenv()
 
-class Config:
+class Config(metaclass=_LazyConfig):
     """Application configuration."""
     
-    # API Configuration
-    API_KEY = os.getenv("OPENWEATHER_API_KEY", "")
-    BASE_URL = os.getenv(
-        "OPENWEATHER_BASE_URL", 
-        "https://api.openweathermap.org/data/2.5/weather"
-    )
+    _settings = None
+    _dotenv_names = set()  # variables we set from .env (not the real environment)
     
     # App Configuration
     APP_TITLE = "Weather App"
@@ -26,6 +104,70 @@ class Config:
     UNITS = "metric"  # metric, imperial, or standard
     TIMEOUT = 10  # seconds
     
+    KEEPALIVE_EXPIRY = 30  # seconds an idle connection is kept open
+    COORD_PRECISION = 2  # decimal places used for coordinate cache keys
+    GROUP_SIZE = 20  # city IDs per request to the group endpoint
+    
+    RETRY_BACKOFF_BASE = 0.5  # seconds before the first retry
+    RETRY_BACKOFF_MAX = 8.0  # cap for a single backoff / Retry-After wait
+    
+    # Circuit breaker: fail fast after repeated upstream failures
+    CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failures before opening
+    CIRCUIT_COOLDOWN = 30  # seconds to fail fast before a trial request
+    
+    REFRESH_BACKOFF_MAX = 3600  # longest wait between failing refreshes
+    
+    SAVE_DELAY = 1.0  # seconds to batch history/preference writes
+    HISTORY_PAGE_SIZE = 20  # history rows rendered at once (the visible window)
+    HISTORY_ROW_HEIGHT = 70  # pixels per history row, spacing included
+    POSTPROCESS_CHUNK_SIZE = 2000  # readings per worker task
+    POSTPROCESS_INLINE_MAX = 32  # smaller batches aren't worth a trip to a worker
+    
+    # Type-ahead suggestions
+    SUGGEST_DEBOUNCE = 0.25  # seconds of idle typing before searching
+    SUGGEST_LIMIT = 8
+    
+    @classmethod
+    def _apply_dotenv(cls):
+        """
+        Copy .env into the environment, never over real variables.
+        
+        Variables that came from .env on an earlier call are updated (or
+        removed if gone from the file), so reload() sees edits to .env.
+        """
+        values = dotenv_values(find_dotenv())
+        for name in cls._dotenv_names - set(values):
+            os.environ.pop(name, None)
+        for name, value in values.items():
+            if value is None:
+                continue
+            if name in os.environ and name not in cls._dotenv_names:
+                continue  # set by the real environment
+            os.environ[name] = value
+            cls._dotenv_names.add(name)
+        cls._dotenv_names &= set(values)
+    
+    @classmethod
+    def _load(cls):
+        """Load .env and read the environment once, then reuse the result."""
+        if cls._settings is None:
+            cls._apply_dotenv()
+            cls._settings = _settings_from_env()
+        return cls._settings
+    
+    @classmethod
+    def reload(cls):
+        """
+        Re-read .env and the environment without re-importing.
+        
+        Precedence is the same as on first load. Objects that copied a
+        setting when they were built keep the old value (e.g. a
+        WeatherService's api_key and base_url); create new ones to use
+        the reloaded settings.
+        """
+        cls._apply_dotenv()
+        cls._settings = _settings_from_env()
+    
     @classmethod
     def validate(cls):
         """Validate that required configuration is present."""
@@ -35,6 +177,3 @@ class Config:
                 "Please create a .env file with your API key."
             )
         return True
-
-# Validate configuration on import
-Config.validate()
\ No newline at end of file
@@ -0,0 +1,281 @@
+# fake_owm_server.py
+"""Local stand-in for the OpenWeatherMap current weather API.
+
+Serves deterministic fake payloads over plain HTTP/1.1 with keep-alive, so
+the weather service can be exercised and benchmarked without network access
+or an API key. Latency, error rates, 429s and payload size are configurable.
+
+Run standalone and point the app at it:
+
+    python fake_owm_server.py --port 8085
+    OPENWEATHER_API_KEY=dummy \\
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8085/data/2.5/weather python main.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+
+# A representative spread of OWM condition codes
+CONDITIONS = [
+    (200, "thunderstorm with light rain", "11d"),
+    (300, "light intensity drizzle", "09d"),
+    (500, "light rain", "10d"),
+    (502, "heavy intensity rain", "10d"),
+    (600, "light snow", "13d"),
+    (701, "mist", "50d"),
+    (741, "fog", "50d"),
+    (800, "clear sky", "01d"),
+    (801, "few clouds", "02d"),
+    (803, "broken clouds", "04d"),
+]
+
+
+@dataclass
+class ServerSettings:
+    """Behaviour knobs for the fake server."""
+
+    latency: float = 0.05  # mean response delay, seconds
+    jitter: float = 0.02  # +/- uniform jitter on the delay, seconds
+    error_rate: float = 0.0  # fraction of requests answered with 503
+    rate_limit_rate: float = 0.0  # fraction of requests answered with 429
+    retry_after: int = 1  # Retry-After seconds sent with 429s
+    payload_padding: int = 0  # extra bytes added to each payload
+
+
+def fake_payload(query: Dict[str, str], padding: int = 0) -> Dict:
+    """Build a deterministic current-weather payload for a query."""
+    if "q" in query:
+        key = query["q"].split(",")[0].strip()
+        name = key.title()
+    elif "id" in query:
+        key = query["id"]
+        name = f"City {key}"
+    else:
+        key = f"{query.get('lat', 0)},{query.get('lon', 0)}"
+        name = f"Point {key}"
+
+    seed = zlib.crc32(key.lower().encode("utf-8"))
+    rng = random.Random(seed)
+    condition_id, description, icon = CONDITIONS[seed % len(CONDITIONS)]
+    temp = round(rng.uniform(-15, 40), 2)
+
+    payload = {
+        "coord": {"lon": round(rng.uniform(-180, 180), 4),
+                  "lat": round(rng.uniform(-90, 90), 4)},
+        "weather": [{
+            "id": condition_id,
+            "main": description.split()[-1].title(),
+            "description": description,
+            "icon": icon,
+        }],
+        "base": "stations",
+        "main": {
+            "temp": temp,
+            "feels_like": round(temp - rng.uniform(0, 4), 2),
+            "temp_min": round(temp - 2, 2),
+            "temp_max": round(temp + 2, 2),
+            "pressure": rng.randint(980, 1040),
+            "humidity": rng.randint(10, 100),
+        },
+        "visibility": 10000,
+        "wind": {"speed": round(rng.uniform(0, 25), 2), "deg": rng.randint(0, 359)},
+        "clouds": {"all": rng.randint(0, 100)},
+        "dt": 1700000000 + seed % 100000,
+        "sys": {"country": "XX", "sunrise": 1699990000, "sunset": 1700030000},
+        "timezone": 0,
+        "id": seed % 10000000,
+        "name": name,
+        "cod": 200,
+    }
+    if padding:
+        payload["padding"] = "x" * padding
+    return payload
+
+
+class FakeOWMServer:
+    """Minimal asyncio HTTP/1.1 server answering like OpenWeatherMap."""
+
+    def __init__(self, settings: Optional[ServerSettings] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.settings = settings or ServerSettings()
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.status_counts: Dict[int, int] = {}
+        self._names: Dict[str, str] = {}  # city ID -> name it was served for
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def base_url(self) -> str:
+        """Current weather endpoint URL of the running server."""
+        return f"http://{self.host}:{self.port}/data/2.5/weather"
+
+    async def start(self):
+        """Start listening (port 0 picks a free port)."""
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Stop accepting connections."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _respond(self, target: str) -> Tuple[int, Dict[str, str], bytes]:
+        """Pick a status and body for one request."""
+        settings = self.settings
+        url = urlsplit(target)
+        query = dict(parse_qsl(url.query))
+        roll = random.random()
+
+        if not query.get("appid"):
+            return 401, {}, b'{"cod":401,"message":"Invalid API key."}'
+        if roll < settings.error_rate:
+            return 503, {}, b'{"cod":503,"message":"Service Unavailable"}'
+        if roll < settings.error_rate + settings.rate_limit_rate:
+            headers = {"Retry-After": str(settings.retry_after)}
+            return 429, headers, b'{"cod":429,"message":"Too many requests"}'
+        if query.get("q", "").lower().startswith("invalid"):
+            return 404, {}, b'{"cod":"404","message":"city not found"}'
+
+        if url.path.endswith("/group"):
+            items = [self._payload({"id": i}) for i in query.get("id", "").split(",")]
+            body = json.dumps({"cnt": len(items), "list": items})
+        else:
+            body = json.dumps(self._payload(query))
+        return 200, {}, body.encode("utf-8")
+
+    def _payload(self, query: Dict[str, str]) -> Dict:
+        """Payload for a query; an ID answers like the name it came from."""
+        if "id" in query and query["id"] in self._names:
+            query = {"q": self._names[query["id"]]}
+        payload = fake_payload(query, self.settings.payload_padding)
+        self._names.setdefault(str(payload["id"]), payload["name"])
+        return payload
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter):
+        """Serve keep-alive requests on one connection until it closes."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = True
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    if (name.strip().lower() == "connection"
+                            and value.strip().lower() == "close"):
+                        keep_alive = False
+
+                parts = request_line.decode("latin-1").split()
+                target = parts[1] if len(parts) > 1 else "/"
+
+                settings = self.settings
+                delay = settings.latency + random.uniform(
+                    -settings.jitter, settings.jitter
+                )
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                status, headers, body = self._respond(target)
+                self.requests += 1
+                self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+                head = [
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}",
+                    "Content-Type: application/json; charset=utf-8",
+                    f"Content-Length: {len(body)}",
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                ]
+                head += [f"{k}: {v}" for k, v in headers.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+class BackgroundServer:
+    """Run a FakeOWMServer on its own event loop in a daemon thread."""
+
+    def __init__(self, settings: Optional[ServerSettings] = None):
+        self.server = FakeOWMServer(settings)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def __enter__(self) -> FakeOWMServer:
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.start(), self._loop).result()
+        return self.server
+
+    def __exit__(self, exc_type, exc, tb):
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+def add_settings_arguments(parser: argparse.ArgumentParser):
+    """Add the ServerSettings options to a command-line parser."""
+    parser.add_argument("--latency", type=float, default=50,
+                        help="mean response latency in ms (default: 50)")
+    parser.add_argument("--jitter", type=float, default=20,
+                        help="latency jitter in ms (default: 20)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of 503 responses (default: 0)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="fraction of 429 responses (default: 0)")
+    parser.add_argument("--retry-after", type=int, default=1,
+                        help="Retry-After seconds sent with 429s (default: 1)")
+    parser.add_argument("--payload-padding", type=int, default=0,
+                        help="extra bytes per payload (default: 0)")
+
+
+def settings_from_args(args: argparse.Namespace) -> ServerSettings:
+    """Build ServerSettings from parsed command-line options."""
+    return ServerSettings(
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        payload_padding=args.payload_padding,
+    )
+
+
+async def serve_forever(server: FakeOWMServer):
+    """Start the server and block until interrupted."""
+    await server.start()
+    print(f"Fake OpenWeatherMap API listening on {server.base_url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8085)
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve_forever(
+            FakeOWMServer(settings_from_args(args), args.host, args.port)
+        ))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,242 @@
+# forecast.py
+"""Columnar forecast series and vectorized daily rollups (NumPy)."""
+
+from dataclasses import dataclass
+from typing import Dict, Sequence, Union
+
+import numpy as np
+
+from models import loads
+
+SECONDS_PER_DAY = 86400
+
+
+@dataclass(frozen=True)
+class ForecastSeries:
+    """A forecast for one location stored as parallel NumPy arrays."""
+
+    __slots__ = (
+        "name",
+        "country",
+        "timezone",
+        "timestamps",
+        "temp",
+        "humidity",
+        "wind_speed",
+    )
+
+    name: str
+    country: str
+    timezone: int  # offset from UTC in seconds
+    timestamps: np.ndarray  # int64 Unix seconds, ascending
+    temp: np.ndarray  # float64, in the units the API was queried with
+    humidity: np.ndarray  # float64, percent
+    wind_speed: np.ndarray  # float64
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __reduce__(self):
+        # Frozen slots can't be set by unpickling; rebuild through __init__
+        # (series are sent to post-processing workers)
+        return (self.__class__, tuple(getattr(self, name) for name in self.__slots__))
+
+    @classmethod
+    def _from_points(cls, points: Sequence[Dict], name: str, country: str,
+                     timezone: int, flat: bool) -> "ForecastSeries":
+        """Build the arrays in one pass per column."""
+        n = len(points)
+        if flat:
+            # One Call hourly entries: {"dt", "temp", "humidity", "wind_speed"}
+            temp = (p.get("temp", np.nan) for p in points)
+            humidity = (p.get("humidity", np.nan) for p in points)
+            wind = (p.get("wind_speed", np.nan) for p in points)
+        else:
+            # 5 day / 3 hour entries: {"dt", "main": {...}, "wind": {...}}
+            temp = ((p.get("main") or {}).get("temp", np.nan) for p in points)
+            humidity = ((p.get("main") or {}).get("humidity", np.nan) for p in points)
+            wind = ((p.get("wind") or {}).get("speed", np.nan) for p in points)
+
+        timestamps = np.fromiter((p.get("dt", 0) for p in points), np.int64, n)
+        order = np.argsort(timestamps, kind="stable")
+        return cls(
+            name=name,
+            country=country,
+            timezone=timezone,
+            timestamps=timestamps[order],
+            temp=np.fromiter(temp, np.float64, n)[order],
+            humidity=np.fromiter(humidity, np.float64, n)[order],
+            wind_speed=np.fromiter(wind, np.float64, n)[order],
+        )
+
+    @classmethod
+    def from_forecast_payload(cls, data: Dict) -> "ForecastSeries":
+        """Parse a 5 day / 3 hour forecast response."""
+        city = data.get("city") or {}
+        return cls._from_points(
+            data.get("list") or [],
+            name=city.get("name", ""),
+            country=city.get("country", ""),
+            timezone=city.get("timezone", 0),
+            flat=False,
+        )
+
+    @classmethod
+    def from_onecall_payload(cls, data: Dict) -> "ForecastSeries":
+        """Parse the hourly series of a One Call response."""
+        return cls._from_points(
+            data.get("hourly") or [],
+            name="",
+            country="",
+            timezone=data.get("timezone_offset", 0),
+            flat=True,
+        )
+
+    @classmethod
+    def from_forecast_json(cls, raw: Union[bytes, str]) -> "ForecastSeries":
+        """Decode and parse a raw 5 day / 3 hour forecast body."""
+        return cls.from_forecast_payload(loads(raw))
+
+    @classmethod
+    def from_onecall_json(cls, raw: Union[bytes, str]) -> "ForecastSeries":
+        """Decode and parse a raw One Call body."""
+        return cls.from_onecall_payload(loads(raw))
+
+
+@dataclass(frozen=True)
+class DailyRollup:
+    """Per-day aggregates, one row per (series, local calendar day)."""
+
+    __slots__ = (
+        "series_index",
+        "day",
+        "count",
+        "temp_min",
+        "temp_max",
+        "temp_mean",
+        "humidity_mean",
+        "wind_max",
+    )
+
+    series_index: np.ndarray  # which input series each row belongs to
+    day: np.ndarray  # datetime64[D], local date
+    count: np.ndarray  # temperatures aggregated into the row (NaN excluded)
+    temp_min: np.ndarray
+    temp_max: np.ndarray
+    temp_mean: np.ndarray
+    humidity_mean: np.ndarray
+    wind_max: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    def __reduce__(self):
+        return (self.__class__, tuple(getattr(self, name) for name in self.__slots__))
+
+
+def daily_rollups(series: Sequence[ForecastSeries]) -> DailyRollup:
+    """
+    Aggregate many forecast series into daily min/max/mean in one pass.
+
+    All series are concatenated and grouped by (series, local day) using
+    run boundaries on the sorted keys, so the cost does not depend on the
+    number of cities beyond the total number of points. Missing values
+    (NaN) are skipped: means are over the values that are present, and a
+    day with none at all gets NaN.
+
+    Args:
+        series: Forecast series, e.g. one per city
+
+    Returns:
+        DailyRollup whose series_index column maps rows back to the input
+    """
+    if not series or not any(len(s) for s in series):
+        empty = np.empty(0)
+        return DailyRollup(
+            np.empty(0, np.int64), np.empty(0, "datetime64[D]"),
+            np.empty(0, np.int64), empty, empty, empty, empty, empty,
+        )
+
+    lengths = np.fromiter((len(s) for s in series), np.int64, len(series))
+    series_index = np.repeat(np.arange(len(series)), lengths)
+    offsets = np.repeat(
+        np.fromiter((s.timezone for s in series), np.int64, len(series)), lengths
+    )
+    timestamps = np.concatenate([s.timestamps for s in series])
+    temp = np.concatenate([s.temp for s in series])
+    humidity = np.concatenate([s.humidity for s in series])
+    wind = np.concatenate([s.wind_speed for s in series])
+
+    # Each series is time-sorted, so (series, day) keys are already sorted
+    days = (timestamps + offsets) // SECONDS_PER_DAY
+    new_group = np.empty(len(days), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = (days[1:] != days[:-1]) | (series_index[1:] != series_index[:-1])
+    starts = np.flatnonzero(new_group)
+
+    return DailyRollup(
+        series_index=series_index[starts],
+        day=days[starts].astype("datetime64[D]"),
+        count=np.add.reduceat(~np.isnan(temp), starts),
+        temp_min=np.fmin.reduceat(temp, starts),
+        temp_max=np.fmax.reduceat(temp, starts),
+        temp_mean=_nanmean_reduceat(temp, starts),
+        humidity_mean=_nanmean_reduceat(humidity, starts),
+        wind_max=np.fmax.reduceat(wind, starts),
+    )
+
+
+def _nanmean_reduceat(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Mean of each run starting at `starts`, ignoring NaN values."""
+    present = ~np.isnan(values)
+    totals = np.add.reduceat(np.where(present, values, 0.0), starts)
+    counts = np.add.reduceat(present, starts)
+    # A run with no values at all: 0 / 0 gives NaN, which is what we want
+    with np.errstate(invalid="ignore"):
+        return totals / counts
+
+
+def daily_rollup(series: ForecastSeries) -> DailyRollup:
+    """Daily min/max/mean for a single forecast series."""
+    return daily_rollups([series])
+
+
+def convert_temperature(values, from_units: str, to_units: str):
+    """
+    Convert temperatures between OpenWeatherMap unit systems.
+
+    Works element-wise on NumPy arrays as well as on plain numbers.
+
+    Args:
+        values: Temperatures in from_units
+        from_units: "metric" (°C), "imperial" (°F) or "standard" (K)
+        to_units: Target unit system
+
+    Returns:
+        Temperatures in to_units
+    """
+    if from_units == to_units:
+        return values
+    if from_units == "imperial":
+        celsius = (values - 32) * 5 / 9
+    elif from_units == "standard":
+        celsius = values - 273.15
+    else:
+        celsius = values
+
+    if to_units == "imperial":
+        return celsius * 9 / 5 + 32
+    if to_units == "standard":
+        return celsius + 273.15
+    return celsius
+
+
+def convert_wind_speed(values, from_units: str, to_units: str):
+    """Convert wind speeds between m/s (metric/standard) and mph (imperial)."""
+    metric_like = ("metric", "standard")
+    if (from_units in metric_like) == (to_units in metric_like):
+        return values
+    if to_units == "imperial":
+        return values * 2.2369362920544
+    return values / 2.2369362920544
+
@@ -1,31 +1,122 @@
 """Weather Application using Flet v0.28.3 with Search History"""
 
+import argparse
+import threading
+import uuid
+from typing import Dict, Optional
+
 import flet as ft
+from alerts import DEFAULT_ENGINE
+from city_index import City, CityIndex, CityOverlay
+from models import WeatherReading
+from scheduler import RefreshScheduler
+from storage import JsonStore, SearchHistory, SessionDatabase
+from themes import theme_for
 from weather_service import WeatherService
 from config import Config
-import json
 from pathlib import Path
-from weather_service import WeatherServiceError
+from weather_service import CityNotFoundError, WeatherServiceError
 import asyncio
 from datetime import datetime
 
 
+# Parsed city lists, shared by all sessions in the process
+_city_indexes: Dict[str, CityIndex] = {}
+_city_index_lock = threading.Lock()
+
+# Client storage key identifying a browser in server mode
+USER_ID_KEY = "weather_app.user_id"
+
+
+def load_shared_city_index(path: str) -> CityIndex:
+    """Parse a city list once per process (read-only: wrap it in a CityOverlay)."""
+    with _city_index_lock:
+        index = _city_indexes.get(path)
+        if index is None:
+            index = _city_indexes[path] = CityIndex.from_file(path)
+        return index
+
+
 class WeatherApp:
     """Main Weather Application class."""
     
-    def __init__(self, page: ft.Page):
+    def __init__(
+        self,
+        page: ft.Page,
+        service: Optional[WeatherService] = None,
+        sessions: Optional[SessionDatabase] = None,
+    ):
         self.page = page
-        self.weather_service = WeatherService()
-        self.history_file = Path("search_history.json")
-        self.preferences_file = Path("user_preferences.json")
+        
+        # A service passed in is shared with other sessions and outlives this one
+        self.owns_service = service is None
+        self.weather_service = service if service is not None else WeatherService()
+        
+        # Saved in the background, at most once per Config.SAVE_DELAY; in
+        # server mode every user gets their own documents in one database
+        if sessions is None:
+            self.history_store = JsonStore("search_history.json", Config.SAVE_DELAY)
+            self.preferences_store = JsonStore("user_preferences.json", Config.SAVE_DELAY)
+        else:
+            user_id = self.get_user_id()
+            self.history_store = sessions.store(user_id, "search_history", Config.SAVE_DELAY)
+            self.preferences_store = sessions.store(user_id, "preferences", Config.SAVE_DELAY)
         self.search_history = self.load_history()
         self.preferences = self.load_preferences()
         self.use_celsius = self.preferences.get("use_celsius", True)
         self.current_weather_data = None
+        self.displayed_city = None
+        
+        # Suggestions come from history until the city list has loaded
+        # (then from the shared list, with this user's cities on top)
+        self.city_index = CityOverlay()
+        for item in self.search_history:
+            self.city_index.add(item.get('city', ''))
+        self.city_list_loaded = False
+        self.selected_city = None
+        self.suggest_task = None
+        
+        # Only the latest search may update the UI
+        self.search_task = None
+        self.search_generation = 0
         self.setup_page()
         self.build_ui()
+        
+        # Keep the displayed city and the configured watch list up to date
+        # (a shared service's cache already holds other sessions' refreshes)
+        self.scheduler = RefreshScheduler(
+            self.weather_service,
+            self.on_weather_refreshed,
+            bypass_cache=self.owns_service,
+        )
+        self.scheduler.watch_many(Config.WATCH_LIST)
+        
+        # Release the service's pooled connections when the session ends
+        self.page.on_close = self.on_close
+        
+        # Don't refresh while the window is hidden
+        self.page.on_app_lifecycle_state_change = self.on_lifecycle_change
+        
+        # Show the last known weather straight away, then refresh it
+        self.page.run_task(self.restore_last_weather)
+        self.page.run_task(self.scheduler.run)
+        self.page.run_task(self.load_city_index)
 
     
+    def get_user_id(self) -> str:
+        """Stable id for this browser, kept in the client's local storage."""
+        try:
+            user_id = self.page.client_storage.get(USER_ID_KEY)
+            if not user_id:
+                user_id = uuid.uuid4().hex
+                self.page.client_storage.set(USER_ID_KEY, user_id)
+            return user_id
+        except Exception as e:
+            # Storage unavailable: keep the data for this session only
+            print(f"Error reading client storage: {e}")
+            return self.page.session_id
+    
+    
     def setup_page(self):
         """Configure page settings."""
         self.page.title = Config.APP_TITLE
@@ -95,6 +186,17 @@ class WeatherApp:
             prefix_icon=ft.Icons.LOCATION_CITY,
             autofocus=True,
             on_submit=self.on_search,
+            on_change=self.on_city_change,
+        )
+        
+        # As-you-type suggestions below the input
+        self.suggestions_list = ft.Column(spacing=0)
+        self.suggestions_box = ft.Container(
+            content=self.suggestions_list,
+            visible=False,
+            bgcolor=ft.Colors.BLUE_50,
+            border_radius=10,
+            padding=5,
         )
         
         # Search button
@@ -150,16 +252,29 @@ class WeatherApp:
             ink=True,
         )
         
-        # History items list in a scrollable container
-        self.history_list = ft.Column(spacing=5)
+        # History items list in a scrollable container. Only a window of
+        # rows around the scroll position exists; spacers stand in for the
+        # rows above and below it so the scrollbar covers the whole history.
+        self.history_list = ft.Column(spacing=0)
+        self.history_rows = {}  # history key -> (entry signature, row control)
+        self.history_start = 0  # rank of the first rendered row
+        self.history_top_spacer = ft.Container(height=0)
+        self.history_bottom_spacer = ft.Container(height=0)
         
         self.history_dropdown = ft.Container(
             content=ft.Column(
                 [
                     ft.Container(
                         content=ft.Column(
-                            [self.history_list],
+                            [
+                                self.history_top_spacer,
+                                self.history_list,
+                                self.history_bottom_spacer,
+                            ],
+                            spacing=0,
                             scroll=ft.ScrollMode.AUTO,
+                            on_scroll=self.on_history_scroll,
+                            on_scroll_interval=100,
                         ),
                         bgcolor=ft.Colors.BLUE_50,
                         border_radius=10,
@@ -172,12 +287,16 @@ class WeatherApp:
             height=0,
         )
         
-        # Weather display container (initially hidden)
+        # Weather display container (initially hidden). Its controls are
+        # built once here and patched in place by display_weather.
         self.weather_container = ft.Container(
+            content=self.build_weather_view(),
             visible=False,
             bgcolor=ft.Colors.BLUE_50,
             border_radius=10,
             padding=20,
+            animate=ft.Animation(500, ft.AnimationCurve.EASE_IN_OUT),
+            animate_opacity=300,
         )
         
         # Error message
@@ -213,6 +332,7 @@ class WeatherApp:
                         title_row,
                         ft.Divider(height=20, color=ft.Colors.TRANSPARENT),
                         self.city_input,
+                        self.suggestions_box,
                         self.search_button,
                         self.history_header,
                         self.history_dropdown,
@@ -233,6 +353,147 @@ class WeatherApp:
         self.update_history_display()
 
 
+    async def on_close(self, e):
+        """Close the weather service when the page session ends."""
+        self.scheduler.stop()
+        
+        # Write pending history/preference changes before the session ends
+        await asyncio.to_thread(self.history_store.flush)
+        await asyncio.to_thread(self.preferences_store.flush)
+        if self.owns_service:
+            await self.weather_service.aclose()
+
+
+    async def on_lifecycle_change(self, e):
+        """Pause background refreshes while the app is hidden."""
+        if e.state in (ft.AppLifecycleState.HIDE, ft.AppLifecycleState.PAUSE):
+            self.scheduler.pause()
+        elif e.state in (ft.AppLifecycleState.SHOW, ft.AppLifecycleState.RESUME):
+            self.scheduler.resume()
+
+
+    async def load_city_index(self):
+        """Load the OpenWeatherMap city list off the event loop, if present."""
+        path = Path(Config.CITY_LIST_FILE)
+        if not path.exists():
+            return
+        
+        try:
+            # Shared by all sessions; this user's cities stay in the overlay
+            self.city_index.base = await asyncio.to_thread(
+                load_shared_city_index, str(path)
+            )
+            self.city_list_loaded = True
+        except Exception as e:
+            print(f"Error loading city list: {e}")
+
+
+    def on_city_change(self, e):
+        """Look up suggestions once the user pauses typing."""
+        self.selected_city = None
+        if self.suggest_task is not None:
+            self.suggest_task.cancel()
+        self.suggest_task = self.page.run_task(self.show_suggestions, self.city_input.value)
+
+
+    async def show_suggestions(self, text: str):
+        """Show the cities matching the typed text (debounced)."""
+        await asyncio.sleep(Config.SUGGEST_DEBOUNCE)
+        cities = []
+        if text.strip():
+            # Fuzzy matching over a large list takes a few milliseconds
+            cities = await asyncio.to_thread(
+                self.city_index.search, text, Config.SUGGEST_LIMIT
+            )
+        self.render_suggestions(cities)
+        self.suggestions_box.update()
+
+
+    def render_suggestions(self, cities: list):
+        """Fill the suggestions list (the caller updates the page)."""
+        self.suggestions_list.controls = [
+            ft.ListTile(
+                leading=ft.Icon(ft.Icons.LOCATION_ON, color=ft.Colors.BLUE_400),
+                title=ft.Text(city.label),
+                dense=True,
+                on_click=lambda e, c=city: self.select_suggestion(c),
+            )
+            for city in cities
+        ]
+        self.suggestions_box.visible = bool(cities)
+
+
+    def hide_suggestions(self):
+        """Cancel pending suggestions and hide the list."""
+        if self.suggest_task is not None:
+            self.suggest_task.cancel()
+            self.suggest_task = None
+        self.suggestions_box.visible = False
+
+
+    def select_suggestion(self, city: City):
+        """Search for a suggested city."""
+        self.city_input.value = city.label
+        self.selected_city = city
+        self.hide_suggestions()
+        self.page.update()
+        self.start_search()
+
+
+    def follow_city(self, city: str):
+        """Auto-refresh the displayed city instead of the previous one."""
+        previous = self.displayed_city
+        self.displayed_city = city
+        if previous and previous != city and previous not in Config.WATCH_LIST:
+            self.scheduler.unwatch(previous)
+        self.scheduler.watch(city)
+
+
+    async def on_weather_refreshed(self, city: str, weather_data: WeatherReading):
+        """Show a background refresh if it is for the displayed city."""
+        # Watched cities that aren't displayed just keep the cache warm
+        if city != self.displayed_city or self.loading.visible:
+            return
+        if weather_data == self.current_weather_data:
+            return
+        self.current_weather_data = weather_data
+        await self.display_weather(weather_data)
+
+
+    async def restore_last_weather(self):
+        """Render the most recent search from disk, then revalidate it."""
+        city = self.search_history.latest()
+        if not city:
+            return
+        
+        # The store is keyed by what was sent to the API, which may differ
+        # from the name the API returned (e.g. "London,GB" -> "London")
+        query = self.search_history.latest_query()
+        cached = await self.weather_service.get_cached_weather(query)
+        if cached is None and query != city:
+            cached = await self.weather_service.get_cached_weather(city)
+        if cached is None:
+            return
+        
+        self.city_input.value = city
+        self.current_weather_data = cached[0]
+        self.follow_city(query)
+        # display_weather only sends the weather controls
+        self.city_input.update()
+        await self.display_weather(cached[0])
+        
+        # Stale-while-revalidate: keep the stored data on screen if this fails
+        try:
+            weather_data = await self.weather_service.get_weather(query)
+        except WeatherServiceError:
+            return
+        
+        # Skip if unchanged, or if the user has searched in the meantime
+        if weather_data != cached[0] and self.current_weather_data is cached[0]:
+            self.current_weather_data = weather_data
+            await self.display_weather(weather_data)
+
+
     def toggle_theme(self, e):
         """Toggle between light and dark theme."""
         if self.page.theme_mode == ft.ThemeMode.LIGHT:
@@ -249,9 +510,10 @@ class WeatherApp:
         self.use_celsius = self.temp_toggle.value
         self.save_preferences()
         
-        # Update display if we have current weather data
+        # Only the temperature texts depend on the unit
         if self.current_weather_data:
-            self.page.run_task(self.display_weather, self.current_weather_data)
+            self.set_temperatures(self.current_weather_data)
+            self.page.update(self.temp_text, self.feels_like_text)
     
     
     def celsius_to_fahrenheit(self, celsius):
@@ -261,59 +523,35 @@ class WeatherApp:
     
     def load_preferences(self):
         """Load user preferences from file."""
-        if self.preferences_file.exists():
-            try:
-                with open(self.preferences_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+        preferences = self.preferences_store.load({})
+        return preferences if isinstance(preferences, dict) else {}
     
     
     def save_preferences(self):
-        """Save user preferences to file."""
-        try:
-            self.preferences["use_celsius"] = self.use_celsius
-            with open(self.preferences_file, 'w') as f:
-                json.dump(self.preferences, f, indent=2)
-        except Exception as e:
-            print(f"Error saving preferences: {e}")
+        """Save user preferences to file (batched, off the UI thread)."""
+        self.preferences["use_celsius"] = self.use_celsius
+        self.preferences_store.save(lambda: dict(self.preferences))
 
 
     def load_history(self):
         """Load search history from file."""
-        if self.history_file.exists():
-            try:
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+        items = self.history_store.load([])
+        return SearchHistory(
+            items if isinstance(items, list) else [],
+            max_items=Config.HISTORY_MAX,
+        )
     
     
     def save_history(self):
-        """Save search history to file."""
-        try:
-            with open(self.history_file, 'w') as f:
-                json.dump(self.search_history, f, indent=2)
-        except Exception as e:
-            print(f"Error saving history: {e}")
+        """Save search history to file (batched, off the UI thread)."""
+        self.history_store.save(self.search_history.to_list)
     
     
-    def add_to_history(self, city: str):
-        """Add city to history."""
-        # Remove city if it already exists (to avoid duplicates)
-        self.search_history = [item for item in self.search_history 
-                               if item.get('city', '').lower() != city.lower()]
-        
-        # Add to beginning of list with timestamp
-        self.search_history.insert(0, {
-            'city': city,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        # Keep only last 10 searches
-        self.search_history = self.search_history[:10]
+    def add_to_history(self, city: str, query: Optional[str] = None):
+        """Add city to history (query: what was sent to the API, if different)."""
+        # Moves an existing entry to the front instead of duplicating it
+        self.search_history.add(city, query=query)
+        self.city_index.add(city)
         
         # Save to file
         self.save_history()
@@ -329,7 +567,9 @@ class WeatherApp:
         if self.history_expanded:
             self.expand_icon.icon = ft.Icons.EXPAND_LESS
             self.history_dropdown.visible = True
-            self.history_dropdown.height = min(300, len(self.search_history) * 70 + 30)
+            self.history_dropdown.height = min(
+                300, len(self.search_history) * Config.HISTORY_ROW_HEIGHT + 30
+            )
         else:
             self.expand_icon.icon = ft.Icons.EXPAND_MORE
             self.history_dropdown.height = 0
@@ -340,10 +580,9 @@ class WeatherApp:
     
     def update_history_display(self):
         """Update the history display with current history."""
-        # Clear existing history items
-        self.history_list.controls.clear()
-        
         if not self.search_history:
+            self.history_list.controls.clear()
+            self.history_rows.clear()
             self.history_header.visible = False
             self.history_dropdown.visible = False
             self.page.update()
@@ -352,94 +591,148 @@ class WeatherApp:
         # Show history header
         self.history_header.visible = True
         
-        # Add history items
-        for item in self.search_history:
-            city = item.get('city', '')
-            timestamp = item.get('timestamp', '')
-            
-            # Format timestamp
-            try:
-                dt = datetime.fromisoformat(timestamp)
-                time_str = dt.strftime("%b %d, %I:%M %p")
-            except:
-                time_str = ""
-            
-            # Create history item button
-            history_item = ft.Container(
-                content=ft.Row(
-                    [
-                        ft.Icon(
-                            ft.Icons.LOCATION_ON,
-                            size=16,
-                            color=ft.Colors.BLUE_600,
-                        ),
-                        ft.Column(
-                            [
-                                ft.Text(
-                                    city,
-                                    size=14,
-                                    weight=ft.FontWeight.W_500,
-                                    color=ft.Colors.BLUE_900,
-                                ),
-                                ft.Text(
-                                    time_str,
-                                    size=11,
-                                    color=ft.Colors.GREY_600,
-                                ) if time_str else ft.Container(),
-                            ],
-                            spacing=2,
-                            expand=True,
-                        ),
-                        ft.IconButton(
-                            icon=ft.Icons.CLOSE,
-                            icon_size=16,
-                            tooltip="Remove from history",
-                            on_click=lambda e, c=city: self.remove_from_history(c),
-                        ),
-                    ],
-                    alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-                ),
-                bgcolor=ft.Colors.WHITE,
-                border_radius=8,
-                padding=10,
-                on_click=lambda e, c=city: self.search_from_history(c),
-                ink=True,
-            )
-            
-            self.history_list.controls.append(history_item)
+        # Only the window of rows around the scroll position is rendered;
+        # rows whose entry didn't change are reused, so Flet just moves
+        # them instead of sending them again
+        total = len(self.search_history)
+        self.history_start = min(
+            self.history_start, max(0, total - Config.HISTORY_PAGE_SIZE)
+        )
+        window = self.search_history.ranked(Config.HISTORY_PAGE_SIZE, self.history_start)
+        self.history_top_spacer.height = self.history_start * Config.HISTORY_ROW_HEIGHT
+        self.history_bottom_spacer.height = (
+            (total - self.history_start - len(window)) * Config.HISTORY_ROW_HEIGHT
+        )
         
+        rows = {}
+        controls = []
+        for item in window:
+            key = SearchHistory.key(item['city'])
+            signature = (item['city'], item['timestamp'], item['count'])
+            cached = self.history_rows.get(key)
+            if cached is not None and cached[0] == signature:
+                row = cached[1]
+            else:
+                row = self.create_history_row(item)
+            rows[key] = (signature, row)
+            controls.append(row)
+        
+        self.history_rows = rows
+        self.history_list.controls = controls
         self.page.update()
     
     
+    def on_history_scroll(self, e: ft.OnScrollEvent):
+        """Move the window of rendered rows along with the scroll position."""
+        # Keep a quarter of the window above the first visible row, and
+        # only re-render once the view gets near either edge of the window
+        first_visible = int(e.pixels // Config.HISTORY_ROW_HEIGHT)
+        margin = Config.HISTORY_PAGE_SIZE // 4
+        start = max(0, first_visible - margin)
+        if abs(start - self.history_start) < margin:
+            return
+        self.history_start = start
+        self.update_history_display()
+    
+    
+    def create_history_row(self, item: dict):
+        """Create the clickable row for one history entry."""
+        city = item.get('city', '')
+        timestamp = item.get('timestamp', '')
+        count = item.get('count', 1)
+        
+        # Format timestamp
+        try:
+            dt = datetime.fromisoformat(timestamp)
+            time_str = dt.strftime("%b %d, %I:%M %p")
+        except (TypeError, ValueError):
+            time_str = ""
+        if count > 1:
+            searches = f"{count} searches"
+            time_str = f"{time_str} · {searches}" if time_str else searches
+        
+        return ft.Container(
+            content=ft.Row(
+                [
+                    ft.Icon(
+                        ft.Icons.LOCATION_ON,
+                        size=16,
+                        color=ft.Colors.BLUE_600,
+                    ),
+                    ft.Column(
+                        [
+                            ft.Text(
+                                city,
+                                size=14,
+                                weight=ft.FontWeight.W_500,
+                                color=ft.Colors.BLUE_900,
+                            ),
+                            ft.Text(
+                                time_str,
+                                size=11,
+                                color=ft.Colors.GREY_600,
+                            ) if time_str else ft.Container(),
+                        ],
+                        spacing=2,
+                        expand=True,
+                    ),
+                    ft.IconButton(
+                        icon=ft.Icons.CLOSE,
+                        icon_size=16,
+                        tooltip="Remove from history",
+                        on_click=lambda e, c=city: self.remove_from_history(c),
+                    ),
+                ],
+                alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+            ),
+            bgcolor=ft.Colors.WHITE,
+            border_radius=8,
+            padding=10,
+            # Fixed height (minus the gap) so rows can be located by offset
+            height=Config.HISTORY_ROW_HEIGHT - 5,
+            margin=ft.margin.only(bottom=5),
+            on_click=lambda e, c=city: self.search_from_history(c),
+            ink=True,
+        )
+    
+    
     def search_from_history(self, city: str):
         """Search weather for a city from history."""
         self.city_input.value = city
         self.page.update()
-        self.page.run_task(self.get_weather)
+        self.start_search()
     
     
     def remove_from_history(self, city: str):
         """Remove a city from search history."""
-        self.search_history = [item for item in self.search_history 
-                               if item.get('city', '').lower() != city.lower()]
+        self.search_history.remove(city)
         self.save_history()
         self.update_history_display()
     
     
     def clear_history(self, e):
         """Clear all search history."""
-        self.search_history = []
+        self.search_history.clear()
         self.save_history()
         self.update_history_display()
     
     
     def on_search(self, e):
         """Handle search button click."""
-        self.page.run_task(self.get_weather)
+        self.start_search()
+    
+    
+    def start_search(self):
+        """Run get_weather, cancelling a search that is still in flight."""
+        if self.search_task is not None:
+            self.search_task.cancel()
+        self.search_task = self.page.run_task(self.get_weather)
 
 
     async def get_weather(self):
         """Fetch and display weather data."""
+        self.search_generation += 1
+        generation = self.search_generation
         city = self.city_input.value.strip()
         
         # Validate input
@@ -447,7 +740,15 @@ class WeatherApp:
             self.show_error("Please enter a city name")
             return
         
+        # A picked suggestion carries the country, so the lookup is exact
+        query = city
+        if self.selected_city is not None and self.selected_city.label == city:
+            query = self.selected_city.query
+            # The city list already knows the ID, so skip the name search
+            self.weather_service.remember_city_id(query, self.selected_city.id)
+        
         # Show loading, hide previous results
+        self.hide_suggestions()
         self.loading.visible = True
         self.error_message.visible = False
         self.weather_container.visible = False
@@ -455,129 +756,48 @@ class WeatherApp:
         
         try:
             # Fetch weather data
-            weather_data = await self.weather_service.get_weather(city)
+            weather_data = await self.weather_service.get_weather(query)
+            
+            # A newer search has started meanwhile: drop this result
+            if generation != self.search_generation:
+                return
             
             # Store current weather data for unit conversion
             self.current_weather_data = weather_data
             
             # Add to history (use the actual city name from API response)
-            actual_city_name = weather_data.get("name", city)
-            self.add_to_history(actual_city_name)
+            self.add_to_history(weather_data.name or city, query)
+            self.follow_city(query)
             
             # Display weather
             await self.display_weather(weather_data)
         
+        except CityNotFoundError as e:
+            # The API doesn't know the name (the city list can't tell: it
+            # misses many names the API accepts), so offer corrections now
+            if generation == self.search_generation:
+                self.show_not_found(city, str(e))
+        
         except WeatherServiceError as e:
             # Show user-friendly error message
-            self.show_error(str(e))
+            if generation == self.search_generation:
+                self.show_error(str(e))
 
         except Exception as e:
-            self.show_error(str(e))
+            if generation == self.search_generation:
+                self.show_error(str(e))
         
         finally:
-            self.loading.visible = False
-            self.page.update()
+            # A cancelled or superseded search leaves the spinner to the new one
+            if generation == self.search_generation:
+                self.loading.visible = False
+                self.page.update()
     
     
-    def get_weather_alerts(self, data: dict, description: str):
+    def get_weather_alerts(self, data: WeatherReading, description: str):
         """Get weather alerts and recommendations based on conditions."""
-        alerts = []
-        temp_celsius = data.get("main", {}).get("temp", 0)
-        humidity = data.get("main", {}).get("humidity", 0)
-        wind_speed = data.get("wind", {}).get("speed", 0)
-        description_lower = description.lower()
-        
-        # Temperature alerts
-        if temp_celsius >= 35:
-            alerts.append({
-                "level": "danger",
-                "icon": "🔥",
-                "title": "Extreme Heat Warning",
-                "message": "Very high temperature! Stay hydrated and avoid prolonged sun exposure.",
-                "recommendation": "Wear sunscreen, drink plenty of water, and stay in shade."
-            })
-        elif temp_celsius >= 30:
-            alerts.append({
-                "level": "warning",
-                "icon": "☀️",
-                "title": "High Temperature",
-                "message": "It's quite hot outside.",
-                "recommendation": "Wear light clothing and apply sunscreen."
-            })
-        elif temp_celsius <= 0:
-            alerts.append({
-                "level": "danger",
-                "icon": "🥶",
-                "title": "Freezing Temperature",
-                "message": "Temperature below freezing!",
-                "recommendation": "Dress in layers, wear warm clothing and watch for ice."
-            })
-        elif temp_celsius <= 5:
-            alerts.append({
-                "level": "warning",
-                "icon": "❄️",
-                "title": "Cold Weather",
-                "message": "It's quite cold outside.",
-                "recommendation": "Wear warm clothes and a jacket."
-            })
-        
-        # Weather condition alerts
-        if "thunder" in description_lower or "storm" in description_lower:
-            alerts.append({
-                "level": "danger",
-                "icon": "⚡",
-                "title": "Thunderstorm Alert",
-                "message": "Thunderstorm in the area!",
-                "recommendation": "Stay indoors and avoid open areas. Unplug electronics."
-            })
-        elif "rain" in description_lower or "drizzle" in description_lower:
-            alerts.append({
-                "level": "info",
-                "icon": "☔",
-                "title": "Rain Expected",
-                "message": "Rainy conditions.",
-                "recommendation": "Bring an umbrella and wear waterproof clothing."
-            })
-        elif "snow" in description_lower:
-            alerts.append({
-                "level": "warning",
-                "icon": "🌨️",
-                "title": "Snow Alert",
-                "message": "Snowy conditions expected.",
-                "recommendation": "Drive carefully and dress warmly. Watch for slippery roads."
-            })
-        
-        # Wind alerts
-        if wind_speed >= 15:
-            alerts.append({
-                "level": "warning",
-                "icon": "💨",
-                "title": "High Wind Warning",
-                "message": f"Strong winds at {wind_speed} m/s!",
-                "recommendation": "Secure loose objects and be cautious outdoors."
-            })
-        
-        # Humidity alerts
-        if humidity >= 80:
-            alerts.append({
-                "level": "info",
-                "icon": "💧",
-                "title": "High Humidity",
-                "message": f"Humidity at {humidity}%.",
-                "recommendation": "It may feel warmer than actual temperature. Stay hydrated."
-            })
-        
-        # Fog/mist alerts
-        if "fog" in description_lower or "mist" in description_lower:
-            alerts.append({
-                "level": "warning",
-                "icon": "🌫️",
-                "title": "Low Visibility",
-                "message": "Foggy conditions reduce visibility.",
-                "recommendation": "Drive slowly and use fog lights if driving."
-            })
-        
-        return alerts
+        # Thresholds live in the rule table in alerts.py
+        return DEFAULT_ENGINE.alerts_for(data, description)
     
     def create_alert_banner(self, alert: dict):
         """Create an alert banner with appropriate styling."""
@@ -652,186 +872,54 @@ class WeatherApp:
             animate=ft.Animation(300, ft.AnimationCurve.EASE_OUT),
         )
     
-    def get_weather_theme(self, icon_code: str, description: str):
+    def get_weather_theme(self, icon_code: str, description: str, condition_id: int = 0):
         """Get theme colors and emoji based on weather condition."""
-        description_lower = description.lower()
-        
-        # Determine weather condition and return theme
-        if "clear" in description_lower or "sun" in description_lower:
-            return {
-                "bg_color": ft.Colors.AMBER_100,
-                "card_color": ft.Colors.AMBER_50,
-                "emoji": "☀️",
-                "accent_color": ft.Colors.ORANGE_700
-            }
-        elif "cloud" in description_lower and "few" in description_lower:
-            return {
-                "bg_color": ft.Colors.BLUE_GREY_100,
-                "card_color": ft.Colors.BLUE_GREY_50,
-                "emoji": "🌤️",
-                "accent_color": ft.Colors.BLUE_GREY_700
-            }
-        elif "cloud" in description_lower:
-            return {
-                "bg_color": ft.Colors.GREY_300,
-                "card_color": ft.Colors.GREY_100,
-                "emoji": "☁️",
-                "accent_color": ft.Colors.GREY_700
-            }
-        elif "rain" in description_lower or "drizzle" in description_lower:
-            return {
-                "bg_color": ft.Colors.BLUE_200,
-                "card_color": ft.Colors.BLUE_50,
-                "emoji": "🌧️",
-                "accent_color": ft.Colors.BLUE_800
-            }
-        elif "thunder" in description_lower or "storm" in description_lower:
-            return {
-                "bg_color": ft.Colors.INDIGO_300,
-                "card_color": ft.Colors.INDIGO_50,
-                "emoji": "⛈️",
-                "accent_color": ft.Colors.INDIGO_900
-            }
-        elif "snow" in description_lower:
-            return {
-                "bg_color": ft.Colors.CYAN_100,
-                "card_color": ft.Colors.CYAN_50,
-                "emoji": "❄️",
-                "accent_color": ft.Colors.CYAN_700
-            }
-        elif "mist" in description_lower or "fog" in description_lower or "haze" in description_lower:
-            return {
-                "bg_color": ft.Colors.BLUE_GREY_200,
-                "card_color": ft.Colors.BLUE_GREY_50,
-                "emoji": "🌫️",
-                "accent_color": ft.Colors.BLUE_GREY_600
-            }
-        else:
-            # Default theme
-            return {
-                "bg_color": ft.Colors.BLUE_100,
-                "card_color": ft.Colors.BLUE_50,
-                "emoji": "🌈",
-                "accent_color": ft.Colors.BLUE_700
-            }
-    
-    async def display_weather(self, data: dict):
-        """Display weather information."""
-        # Extract data
-        city_name = data.get("name", "Unknown")
-        country = data.get("sys", {}).get("country", "")
-        temp_celsius = data.get("main", {}).get("temp", 0)
-        feels_like_celsius = data.get("main", {}).get("feels_like", 0)
-        humidity = data.get("main", {}).get("humidity", 0)
-        description = data.get("weather", [{}])[0].get("description", "").title()
-        icon_code = data.get("weather", [{}])[0].get("icon", "01d")
-        wind_speed = data.get("wind", {}).get("speed", 0)
+        # Shared, immutable theme objects from the table in themes.py
+        return theme_for(condition_id, icon_code, description)
+    
+    def build_weather_view(self):
+        """Build the weather display controls once and keep references."""
+        # Alert banners (at the top), rebuilt only when the alerts change
+        self.alerts_column = ft.Column(spacing=10, visible=False)
+        self.shown_alerts = ()
         
-        # Get weather theme
-        theme = self.get_weather_theme(icon_code, description)
+        # Weather emoji (large)
+        self.weather_emoji = ft.Text("", size=80)
         
-        # Get weather alerts
-        alerts = self.get_weather_alerts(data, description)
+        # Location
+        self.location_text = ft.Text("", size=24, weight=ft.FontWeight.BOLD)
         
-        # Convert temperature based on user preference
-        if self.use_celsius:
-            temp = temp_celsius
-            feels_like = feels_like_celsius
-            unit = "°C"
-        else:
-            temp = self.celsius_to_fahrenheit(temp_celsius)
-            feels_like = self.celsius_to_fahrenheit(feels_like_celsius)
-            unit = "°F"
+        # Weather description
+        self.description_text = ft.Text("", size=20, italic=True)
         
-        # Build alerts section
-        alerts_section = ft.Column(spacing=10)
-        if alerts:
-            for alert in alerts:
-                alerts_section.controls.append(self.create_alert_banner(alert))
+        # Temperature
+        self.temp_text = ft.Text("", size=48, weight=ft.FontWeight.BOLD)
+        self.feels_like_text = ft.Text("", size=16, color=ft.Colors.GREY_700)
         
-        # Build weather display
-        self.weather_container.content = ft.Column(
+        # Additional info cards
+        self.humidity_card = self.create_info_card(ft.Icons.WATER_DROP, "Humidity", "")
+        self.wind_card = self.create_info_card(ft.Icons.AIR, "Wind Speed", "")
+        self.pressure_card = self.create_info_card(ft.Icons.COMPRESS, "Pressure", "")
+        self.clouds_card = self.create_info_card(ft.Icons.CLOUD, "Cloudiness", "")
+        
+        return ft.Column(
             [
-                # Alerts section (at the top)
-                alerts_section if alerts else ft.Container(),
-                # Weather emoji (large)
-                ft.Text(
-                    theme["emoji"],
-                    size=80,
-                ),
-                
-                # Location
-                ft.Text(
-                    f"{city_name}, {country}",
-                    size=24,
-                    weight=ft.FontWeight.BOLD,
-                    color=theme["accent_color"],
-                ),
-                
-                # Weather description
-                ft.Text(
-                    description,
-                    size=20,
-                    italic=True,
-                    color=theme["accent_color"],
-                ),
-                
-                # Temperature
-                ft.Text(
-                    f"{temp:.1f}{unit}",
-                    size=48,
-                    weight=ft.FontWeight.BOLD,
-                    color=theme["accent_color"],
-                ),
-                
-                ft.Text(
-                    f"Feels like {feels_like:.1f}{unit}",
-                    size=16,
-                    color=ft.Colors.GREY_700,
-                ),
-                
+                self.alerts_column,
+                self.weather_emoji,
+                self.location_text,
+                self.description_text,
+                self.temp_text,
+                self.feels_like_text,
                 ft.Divider(),
-                
                 # Additional info - First row
                 ft.Row(
-                    [
-                        self.create_info_card(
-                            ft.Icons.WATER_DROP,
-                            "Humidity",
-                            f"{humidity}%",
-                            theme["card_color"],
-                            theme["accent_color"]
-                        ),
-                        self.create_info_card(
-                            ft.Icons.AIR,
-                            "Wind Speed",
-                            f"{wind_speed} m/s",
-                            theme["card_color"],
-                            theme["accent_color"]
-                        ),
-                    ],
+                    [self.humidity_card, self.wind_card],
                     alignment=ft.MainAxisAlignment.CENTER,
                     spacing=20,
                 ),
-                
                 # Additional info - Second row
                 ft.Row(
-                    [
-                        self.create_info_card(
-                            ft.Icons.COMPRESS,
-                            "Pressure",
-                            f"{data.get('main', {}).get('pressure', 0)} hPa",
-                            theme["card_color"],
-                            theme["accent_color"]
-                        ),
-                        self.create_info_card(
-                            ft.Icons.CLOUD,
-                            "Cloudiness",
-                            f"{data.get('clouds', {}).get('all', 0)}%",
-                            theme["card_color"],
-                            theme["accent_color"]
-                        ),
-                    ],
+                    [self.pressure_card, self.clouds_card],
                     alignment=ft.MainAxisAlignment.CENTER,
                     spacing=20,
                 ),
@@ -839,23 +927,75 @@ class WeatherApp:
             horizontal_alignment=ft.CrossAxisAlignment.CENTER,
             spacing=10,
         )
+    
+    def set_temperatures(self, data: WeatherReading):
+        """Write the temperature texts in the selected unit."""
+        # Convert temperature based on user preference
+        if self.use_celsius:
+            temp = data.temp
+            feels_like = data.feels_like
+            unit = "°C"
+        else:
+            temp = self.celsius_to_fahrenheit(data.temp)
+            feels_like = self.celsius_to_fahrenheit(data.feels_like)
+            unit = "°F"
+        
+        self.temp_text.value = f"{temp:.1f}{unit}"
+        self.feels_like_text.value = f"Feels like {feels_like:.1f}{unit}"
+    
+    def set_alerts(self, alerts: list):
+        """Replace the alert banners, but only if the alerts changed."""
+        key = tuple((alert["title"], alert["message"]) for alert in alerts)
+        if key == self.shown_alerts:
+            return
+        
+        self.shown_alerts = key
+        self.alerts_column.controls = [self.create_alert_banner(alert) for alert in alerts]
+        self.alerts_column.visible = bool(alerts)
+    
+    async def display_weather(self, data: WeatherReading):
+        """Display weather information."""
+        # Extract data
+        city_name = data.name or "Unknown"
+        description = data.description.title()
         
-        # Update container with theme colors and smooth transition
-        self.weather_container.bgcolor = theme["bg_color"]
-        self.weather_container.animate = ft.Animation(500, ft.AnimationCurve.EASE_IN_OUT)
+        # Get weather theme
+        theme = self.get_weather_theme(data.icon, description, data.condition_id)
+        
+        # Get weather alerts
+        self.set_alerts(self.get_weather_alerts(data, description))
+        
+        # Patch the existing controls; Flet only sends the properties that
+        # actually changed
+        self.weather_emoji.value = theme.emoji
+        self.location_text.value = f"{city_name}, {data.country}"
+        self.location_text.color = theme.accent_color
+        self.description_text.value = description
+        self.description_text.color = theme.accent_color
+        self.set_temperatures(data)
+        self.temp_text.color = theme.accent_color
+        
+        self.update_info_card(self.humidity_card, f"{data.humidity}%", theme)
+        self.update_info_card(self.wind_card, f"{data.wind_speed} m/s", theme)
+        self.update_info_card(self.pressure_card, f"{data.pressure} hPa", theme)
+        self.update_info_card(self.clouds_card, f"{data.clouds}%", theme)
+        
+        # Update container with theme colors (animated by the container)
+        self.weather_container.bgcolor = theme.bg_color
+        self.error_message.visible = False
+        
+        if self.weather_container.visible:
+            # Already on screen: a single update, no fade
+            self.page.update(self.error_message, self.weather_container)
+            return
         
-        # Animate container appearance
-        self.weather_container.animate_opacity = 300
+        # Fade in when the container goes from hidden to visible
         self.weather_container.opacity = 0
         self.weather_container.visible = True
-        self.page.update()
-
-        # Fade in
+        self.page.update(self.error_message, self.weather_container)
         await asyncio.sleep(0.1)
         self.weather_container.opacity = 1
-        self.page.update()
-
-        self.error_message.visible = False
+        self.weather_container.update()
     
     
     def create_info_card(self, icon, label, value, card_color=ft.Colors.WHITE, accent_color=ft.Colors.BLUE_700):
@@ -882,6 +1022,24 @@ class WeatherApp:
             animate=ft.Animation(300, ft.AnimationCurve.EASE_IN_OUT),
         )
     
+    def update_info_card(self, card: ft.Container, value: str, theme):
+        """Set the value and colors of a card made by create_info_card."""
+        icon, _, value_text = card.content.controls
+        icon.color = theme.accent_color
+        value_text.value = value
+        value_text.color = theme.accent_color
+        card.bgcolor = theme.card_color
+    
+    
+    def show_not_found(self, city: str, message: str):
+        """Report an unknown city, suggesting close matches if there are any."""
+        matches = self.city_index.search(city, limit=3) if self.city_list_loaded else []
+        if not matches:
+            self.show_error(message)
+            return
+        self.render_suggestions(matches)
+        self.show_error(f"City '{city}' not found. Did you mean one of these?")
+    
     
     def show_error(self, message: str):
         """Display error message."""
@@ -896,5 +1054,35 @@ def main(page: ft.Page):
     WeatherApp(page)
 
 
+# Server mode: one service (connection pool and cache) for all sessions
+_shared_service: Optional[WeatherService] = None
+_sessions: Optional[SessionDatabase] = None
+_shared_lock = threading.Lock()
+
+
+def server_main(page: ft.Page):
+    """Entry point for each browser session in server (web) mode."""
+    global _shared_service, _sessions
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = WeatherService()
+            _sessions = SessionDatabase(Config.SESSION_DB)
+    WeatherApp(page, service=_shared_service, sessions=_sessions)
+
+
 if __name__ == "__main__":
-    ft.app(target=main)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=Config.APP_TITLE)
+    parser.add_argument("--web", action="store_true",
+                        help="serve all browser sessions from one process")
+    parser.add_argument("--port", type=int, default=None,
+                        help="port for --web (default: Config.SERVER_PORT)")
+    args = parser.parse_args()
+    
+    if args.web:
+        ft.app(
+            target=server_main,
+            view=ft.AppView.WEB_BROWSER,
+            port=args.port or Config.SERVER_PORT,
+        )
+    else:
+        ft.app(target=main)
\ No newline at end of file
@@ -0,0 +1,198 @@
+# metrics.py
+"""In-process metrics registry for the weather service.
+
+Counters, histograms and callback gauges are kept in memory and can be
+dumped as Prometheus text exposition format or JSON.
+"""
+
+import json
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+# Latency buckets in seconds (upper bounds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# httpcore trace phases we time, mapped to histogram names
+TRACE_PHASES = {
+    "connect_tcp": "weather_upstream_connect_seconds",
+    "start_tls": "weather_upstream_tls_seconds",
+    "receive_response_headers": "weather_upstream_ttfb_seconds",
+}
+
+
+class Histogram:
+    """Cumulative bucket histogram, as used by Prometheus."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """Record one observation."""
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+def _labels_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class MetricsRegistry:
+    """Thread-safe store of named counters, histograms and gauges."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, tuple], float] = {}
+        self._histograms: Dict[Tuple[str, tuple], Histogram] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Increase a counter."""
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Add an observation to a histogram."""
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def register_gauge(self, name: str, read: Callable[[], float]):
+        """Register a gauge whose value is read when metrics are dumped."""
+        with self._lock:
+            self._gauges[name] = read
+
+    def snapshot(self) -> Dict:
+        """Return all current values as plain data."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {
+                key: (h.buckets, list(h.counts), h.count, h.sum)
+                for key, h in self._histograms.items()
+            }
+            gauges = dict(self._gauges)
+
+        result = {"counters": [], "histograms": [], "gauges": []}
+        for (name, labels), value in sorted(counters.items()):
+            result["counters"].append(
+                {"name": name, "labels": dict(labels), "value": value}
+            )
+        for (name, labels), (buckets, counts, count, total) in sorted(histograms.items()):
+            result["histograms"].append({
+                "name": name,
+                "labels": dict(labels),
+                "buckets": dict(zip(map(str, buckets), counts)),
+                "count": count,
+                "sum": total,
+            })
+        for name, read in sorted(gauges.items()):
+            try:
+                value = float(read())
+            except Exception:
+                continue
+            result["gauges"].append({"name": name, "value": value})
+        return result
+
+    def to_json(self) -> str:
+        """Dump all metrics as a JSON document."""
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Dump all metrics in Prometheus text exposition format."""
+        data = self.snapshot()
+        lines = []
+        typed = set()
+
+        def declare(name: str, kind: str):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for c in data["counters"]:
+            declare(c["name"], "counter")
+            labels = _format_labels(_labels_key(c["labels"]))
+            lines.append(f"{c['name']}{labels} {c['value']:g}")
+        for h in data["histograms"]:
+            name = h["name"]
+            labels = _labels_key(h["labels"])
+            declare(name, "histogram")
+            for bound, count in h["buckets"].items():
+                le = _format_labels(labels, f'le="{bound}"')
+                lines.append(f"{name}_bucket{le} {count}")
+            le = _format_labels(labels, 'le="+Inf"')
+            lines.append(f"{name}_bucket{le} {h['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {h['sum']:g}")
+            lines.append(f"{name}_count{_format_labels(labels)} {h['count']}")
+        for g in data["gauges"]:
+            declare(g["name"], "gauge")
+            lines.append(f"{g['name']} {g['value']:g}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Drop all recorded values (registered gauges are kept)."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+# Process-wide default registry
+REGISTRY = MetricsRegistry()
+
+
+def make_event_hooks(registry: MetricsRegistry) -> Dict[str, list]:
+    """
+    Build httpx event hooks that time connection phases of each request.
+
+    A request hook attaches an httpcore "trace" callback that records TCP
+    connect (including DNS resolution, which httpcore does not report
+    separately), TLS handshake and time-to-first-byte. A response hook
+    counts status codes.
+
+    Args:
+        registry: Where to record the metrics
+
+    Returns:
+        Mapping suitable for httpx.AsyncClient(event_hooks=...)
+    """
+
+    async def on_request(request):
+        started: Dict[str, float] = {}
+        previous: Optional[Callable] = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict):
+            if previous is not None:
+                await previous(event_name, info)
+            # Event names look like "connection.connect_tcp.started"
+            _, _, phase_event = event_name.partition(".")
+            phase, _, stage = phase_event.rpartition(".")
+            metric = TRACE_PHASES.get(phase)
+            if metric is None:
+                return
+            if stage == "started":
+                started[phase] = time.perf_counter()
+            elif stage == "complete" and phase in started:
+                registry.observe(metric, time.perf_counter() - started.pop(phase))
+
+        request.extensions["trace"] = trace
+
+    async def on_response(response):
+        registry.inc("weather_upstream_responses_total", status=response.status_code)
+
+    return {"request": [on_request], "response": [on_response]}
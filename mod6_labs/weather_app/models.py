@@ -0,0 +1,95 @@
+# models.py
+"""Typed records parsed from OpenWeatherMap payloads."""
+
+from dataclasses import dataclass
+from typing import Dict, Union
+
+try:
+    # orjson decodes several times faster than the standard library
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
+
+def loads(raw: Union[bytes, str]):
+    """Decode a JSON document with the fastest available decoder."""
+    return _loads(raw)
+
+
+@dataclass(frozen=True)
+class WeatherReading:
+    """Current weather for one location, keeping only the fields we use."""
+
+    __slots__ = (
+        "city_id",
+        "name",
+        "country",
+        "lat",
+        "lon",
+        "temp",
+        "feels_like",
+        "humidity",
+        "pressure",
+        "wind_speed",
+        "clouds",
+        "condition_id",
+        "description",
+        "icon",
+        "timestamp",
+    )
+
+    city_id: int
+    name: str
+    country: str
+    lat: float
+    lon: float
+    temp: float
+    feels_like: float
+    humidity: int
+    pressure: int
+    wind_speed: float
+    clouds: int
+    condition_id: int
+    description: str
+    icon: str
+    timestamp: int
+
+    @classmethod
+    def from_payload(cls, data: Dict) -> "WeatherReading":
+        """
+        Build a reading from a decoded current-weather payload.
+
+        Missing sections fall back to the same defaults the UI used when it
+        read the raw dictionary.
+
+        Args:
+            data: Decoded API response
+
+        Returns:
+            WeatherReading with the fields used by the app
+        """
+        main = data.get("main") or {}
+        coord = data.get("coord") or {}
+        weather = (data.get("weather") or [{}])[0]
+        return cls(
+            city_id=data.get("id", 0),
+            name=data.get("name", ""),
+            country=(data.get("sys") or {}).get("country", ""),
+            lat=coord.get("lat", 0.0),
+            lon=coord.get("lon", 0.0),
+            temp=main.get("temp", 0),
+            feels_like=main.get("feels_like", 0),
+            humidity=main.get("humidity", 0),
+            pressure=main.get("pressure", 0),
+            wind_speed=(data.get("wind") or {}).get("speed", 0),
+            clouds=(data.get("clouds") or {}).get("all", 0),
+            condition_id=weather.get("id", 0),
+            description=weather.get("description", ""),
+            icon=weather.get("icon", ""),
+            timestamp=data.get("dt", 0),
+        )
+
+    @classmethod
+    def from_json(cls, raw: Union[bytes, str]) -> "WeatherReading":
+        """Decode and parse a raw current-weather response body."""
+        return cls.from_payload(loads(raw))
@@ -0,0 +1,178 @@
+# postprocess.py
+"""Batch post-processing: alert codes, theme category and forecast rollups.
+
+The work is pure functions over compact tuples and NumPy series, so it can
+run inline or in worker processes. The pool is meant for command-line and
+batch jobs such as postprocess_benchmark.py; the app does not use it.
+Workers are spawned, and a spawned worker re-imports the parent's __main__
+module, so a pool started under main.py would load Flet in every worker.
+"""
+
+import asyncio
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from alerts import DEFAULT_ENGINE
+from conditions import classify
+from config import Config
+from forecast import DailyRollup, ForecastSeries, daily_rollups
+from models import WeatherReading
+
+# (temp, humidity, wind_speed, condition_id, icon, description)
+Row = Tuple[float, float, float, int, str, str]
+
+# (alert codes in rule order, condition category for themes.THEMES)
+Result = Tuple[Tuple[str, ...], int]
+
+
+def compact(reading: WeatherReading) -> Row:
+    """The fields post-processing needs, as a cheap-to-pickle tuple."""
+    return (
+        reading.temp,
+        reading.humidity,
+        reading.wind_speed,
+        reading.condition_id,
+        reading.icon,
+        reading.description,
+    )
+
+
+def process_rows(rows: Sequence[Row]) -> List[Result]:
+    """
+    Compute alert codes and condition category for a batch of rows.
+
+    All rules are evaluated for the whole batch in one vectorized pass.
+
+    Args:
+        rows: Compact readings (see compact())
+
+    Returns:
+        One (alert codes, category) tuple per row, in input order
+    """
+    if not rows:
+        return []
+    temp, humidity, wind_speed, condition_ids, icons, descriptions = zip(*rows)
+    categories = [
+        classify(condition_id, icon, description)
+        for condition_id, icon, description in zip(condition_ids, icons, descriptions)
+    ]
+    matches = DEFAULT_ENGINE.evaluate(temp, humidity, wind_speed, categories)
+    return list(zip(DEFAULT_ENGINE.codes_for(matches), categories))
+
+
+def merge_rollups(parts: Sequence[DailyRollup], sizes: Sequence[int]) -> DailyRollup:
+    """
+    Concatenate the rollups of consecutive chunks of series.
+
+    Args:
+        parts: daily_rollups() of each chunk, in order
+        sizes: Number of series in each chunk
+
+    Returns:
+        The rollup of all series, as if computed in one call
+    """
+    offsets = np.cumsum([0, *sizes[:-1]])
+    return DailyRollup(*(
+        np.concatenate([
+            part.series_index + offset if name == "series_index" else getattr(part, name)
+            for part, offset in zip(parts, offsets)
+        ])
+        for name in DailyRollup.__slots__
+    ))
+
+
+class PostProcessor:
+    """
+    Run post-processing inline or on a process pool, in chunks.
+
+    With workers=0 everything runs in the calling thread. Otherwise any
+    batch larger than inline_max is split into one chunk per worker (at
+    most chunk_size items each) and processed by a ProcessPoolExecutor, so
+    the event loop stays free. Tiny batches stay inline, where a round trip
+    to a worker would cost more than the work.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                 inline_max: Optional[int] = None):
+        self.workers = workers if workers is not None else Config.POSTPROCESS_WORKERS
+        self.chunk_size = chunk_size or Config.POSTPROCESS_CHUNK_SIZE
+        self.inline_max = (
+            inline_max if inline_max is not None else Config.POSTPROCESS_INLINE_MAX
+        )
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Start the pool on first use."""
+        if self._executor is None:
+            # "spawn" so workers do not inherit a forked event loop or
+            # threads; they still re-import the parent's __main__
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _inline(self, count: int) -> bool:
+        return not self.workers or count <= self.inline_max
+
+    def _chunks(self, items: Sequence) -> List[Sequence]:
+        """Split items evenly over the workers, at most chunk_size each."""
+        size = min(self.chunk_size, math.ceil(len(items) / self.workers))
+        return [items[start:start + size] for start in range(0, len(items), size)]
+
+    async def _map(self, func, chunks: List[Sequence]) -> list:
+        """Run func on every chunk in the pool; results in chunk order."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        return await asyncio.gather(
+            *(loop.run_in_executor(executor, func, chunk) for chunk in chunks)
+        )
+
+    async def process(self, readings: Sequence[WeatherReading]) -> List[Result]:
+        """
+        Post-process readings, off the event loop when a pool is configured.
+
+        Args:
+            readings: Parsed readings
+
+        Returns:
+            One (alert codes, category) tuple per reading, in input order
+        """
+        rows = [compact(reading) for reading in readings]
+        if self._inline(len(rows)):
+            return process_rows(rows)
+        results = await self._map(process_rows, self._chunks(rows))
+        return [result for chunk in results for result in chunk]
+
+    async def rollups(self, series: Sequence[ForecastSeries]) -> DailyRollup:
+        """
+        Daily forecast rollups for many cities (see forecast.daily_rollups).
+
+        Args:
+            series: Forecast series, e.g. one per city
+
+        Returns:
+            DailyRollup whose series_index column maps rows back to series
+        """
+        series = list(series)
+        if self._inline(len(series)):
+            return daily_rollups(series)
+        chunks = self._chunks(series)
+        parts = await self._map(daily_rollups, chunks)
+        return merge_rollups(parts, [len(chunk) for chunk in chunks])
+
+    def close(self):
+        """Shut the worker processes down."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,142 @@
+# postprocess_benchmark.py
+"""Compare inline and process-pool post-processing throughput.
+
+Builds N synthetic readings from the fake OWM server's payloads and times
+alert/theme post-processing three ways: one reading at a time (what the UI
+does per search), one vectorized batch inline, and chunks on a process
+pool. Daily forecast rollups for M synthetic 5 day / 3 hour series are
+timed inline and pooled too. Also reports how long the event loop stays
+blocked in each mode.
+
+    python postprocess_benchmark.py --readings 100000 --series 5000 --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from alerts import DEFAULT_ENGINE
+from conditions import classify
+from fake_owm_server import fake_payload
+from forecast import ForecastSeries
+from models import WeatherReading
+from postprocess import PostProcessor, process_rows, compact
+
+
+def make_readings(count: int):
+    """Deterministic readings covering the fake server's condition codes."""
+    return [
+        WeatherReading.from_payload(fake_payload({"q": f"City{i}"}))
+        for i in range(count)
+    ]
+
+
+def make_series(count: int, points: int = 40):
+    """Deterministic 5 day / 3 hour forecast series, one per city."""
+    rng = np.random.default_rng(0)
+    start = 1700000000
+    timestamps = start + np.arange(points, dtype=np.int64) * 3 * 3600
+    return [
+        ForecastSeries(
+            name=f"City{i}",
+            country="XX",
+            timezone=int(rng.integers(-12, 13)) * 3600,
+            timestamps=timestamps,
+            temp=rng.normal(15, 10, points),
+            humidity=rng.uniform(0, 100, points),
+            wind_speed=rng.uniform(0, 20, points),
+        )
+        for i in range(count)
+    ]
+
+
+def per_reading(readings):
+    """The UI path: one alert evaluation and theme lookup per reading."""
+    return [
+        (DEFAULT_ENGINE.alerts_for(r, r.description), classify(r.condition_id, r.icon, r.description))
+        for r in readings
+    ]
+
+
+async def timed(processor: PostProcessor, readings, method: str = "process"):
+    """Time a processor method and the longest gap in a ticker alongside."""
+    longest_gap = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal longest_gap
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            longest_gap = max(longest_gap, now - last)
+            last = now
+
+    tick = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    results = await getattr(processor, method)(readings)
+    elapsed = time.perf_counter() - started
+    running = False
+    await tick
+    return results, elapsed, longest_gap
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readings", type=int, default=50000,
+                        help="readings per run (default: 50000)")
+    parser.add_argument("--series", type=int, default=5000,
+                        help="forecast series for the rollup runs (default: 5000)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2,
+                        help="worker processes for the pooled run (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="readings per worker task (default: Config.POSTPROCESS_CHUNK_SIZE)")
+    args = parser.parse_args()
+
+    readings = make_readings(args.readings)
+    n = len(readings)
+    print(f"Post-processing {n} readings")
+    print("=" * 50)
+
+    started = time.perf_counter()
+    per_reading(readings[:min(n, 5000)])
+    elapsed = (time.perf_counter() - started) * n / min(n, 5000)
+    print(f"Per reading (UI path): {n / elapsed:12.0f} readings/s")
+
+    inline = PostProcessor(workers=0)
+    expected, elapsed, gap = asyncio.run(timed(inline, readings))
+    print(f"Batch inline:          {n / elapsed:12.0f} readings/s"
+          f"  (loop blocked up to {gap * 1000:.1f} ms)")
+
+    with PostProcessor(workers=args.workers, chunk_size=args.chunk_size) as pooled:
+        # Warm up: spawn the workers and import NumPy there first
+        asyncio.run(pooled.process(readings[:pooled.chunk_size * args.workers + 1]))
+        results, elapsed, gap = asyncio.run(timed(pooled, readings))
+    print(f"Process pool ({args.workers} workers): {n / elapsed:8.0f} readings/s"
+          f"  (loop blocked up to {gap * 1000:.1f} ms)")
+
+    assert results == expected == process_rows([compact(r) for r in readings])
+
+    series = make_series(args.series)
+    print()
+    print(f"Daily rollups of {len(series)} forecast series")
+    print("=" * 50)
+    expected, elapsed, gap = asyncio.run(timed(inline, series, "rollups"))
+    print(f"Inline:                {len(series) / elapsed:12.0f} series/s"
+          f"  (loop blocked up to {gap * 1000:.1f} ms)")
+    with PostProcessor(workers=args.workers, chunk_size=args.chunk_size) as pooled:
+        asyncio.run(pooled.rollups(series[:pooled.inline_max + 1]))
+        results, elapsed, gap = asyncio.run(timed(pooled, series, "rollups"))
+    print(f"Process pool ({args.workers} workers): {len(series) / elapsed:8.0f} series/s"
+          f"  (loop blocked up to {gap * 1000:.1f} ms)")
+
+    for name in ("series_index", "day", "count", "temp_min", "temp_max", "wind_max"):
+        assert np.array_equal(getattr(results, name), getattr(expected, name))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# render_benchmark.py
+"""Replay recorded OWM payloads through the weather view and time it.
+
+Loads fixtures/owm_payloads.json (every condition code, extreme values and
+payloads with missing fields), renders each one with
+WeatherApp.display_weather on a real ft.Page whose connection only records
+what would be sent to the client, and reports time and commands per render
+for the first render (view hidden) and for re-renders (view on screen,
+with a new or the same payload).
+Alert and theme selection are timed on their own as well. Any payload that
+fails to render is listed and makes the script exit with status 1.
+
+    python render_benchmark.py --rounds 20
+    python render_benchmark.py --fixtures my_payloads.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Benchmarks must not need a real key or touch the on-disk cache
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+os.environ.setdefault("WEATHER_CACHE_DB", "")
+
+import flet as ft
+from flet.core.connection import Connection
+from flet.core.protocol import PageCommandResponsePayload, PageCommandsBatchResponsePayload
+
+from main import WeatherApp
+from models import WeatherReading
+
+DEFAULT_FIXTURES = Path(__file__).parent / "fixtures" / "owm_payloads.json"
+
+
+class RecordingConnection(Connection):
+    """A connection with no client: records command batches, answers adds."""
+
+    def __init__(self):
+        super().__init__()
+        self._ids = itertools.count(1)
+        self.batches = []  # (perf_counter timestamp, commands)
+
+    def send_command(self, session_id, command):
+        return PageCommandResponsePayload(result="", error="")
+
+    def send_commands(self, session_id, commands):
+        self.batches.append((time.perf_counter(), commands))
+        results = []
+        for command in commands:
+            if command.name == "add":
+                # The client answers an add with one id per new control
+                results.append(" ".join(f"_{next(self._ids)}" for _ in command.commands))
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+
+def load_fixtures(path: Path):
+    """(name, reading) pairs from a fixtures file."""
+    with open(path, "r", encoding="utf-8") as f:
+        document = json.load(f)
+    return [
+        (case["name"], WeatherReading.from_payload(case["payload"]))
+        for case in document["cases"]
+    ]
+
+
+def count_controls(control) -> int:
+    """Number of controls in a subtree, the root included."""
+    return 1 + sum(count_controls(child) for child in control._get_children())
+
+
+def count_commands(batches):
+    """(commands, properties set, controls added) in recorded batches."""
+    commands = properties = added = 0
+    for _, batch in batches:
+        for command in batch:
+            commands += 1
+            properties += len(command.attrs)
+            if command.name == "add":
+                added += len(command.commands)
+    return commands, properties, added
+
+
+async def render(app: WeatherApp, conn: RecordingConnection, reading: WeatherReading):
+    """
+    Render one reading.
+
+    Returns:
+        (seconds until the first update was sent, seconds in total, batches)
+    """
+    conn.batches.clear()
+    started = time.perf_counter()
+    await app.display_weather(reading)
+    finished = time.perf_counter()
+    batches = list(conn.batches)
+    first_sent = batches[0][0] if batches else finished
+    return first_sent - started, finished - started, batches
+
+
+def summarize(label: str, samples):
+    """Print latency and command counts for a list of render samples."""
+    to_update = sorted(sample[0] for sample in samples)
+    total = sorted(sample[1] for sample in samples)
+    counts = [count_commands(sample[2]) for sample in samples]
+    print(f"{label} ({len(samples)} renders)")
+    print(f"  until update sent: median {statistics.median(to_update) * 1000:.3f} ms, "
+          f"max {to_update[-1] * 1000:.3f} ms")
+    print(f"  total:             median {statistics.median(total) * 1000:.3f} ms, "
+          f"max {total[-1] * 1000:.3f} ms")
+    print(f"  commands/render:   {statistics.mean(c[0] for c in counts):.1f} "
+          f"({statistics.mean(c[1] for c in counts):.1f} properties, "
+          f"{statistics.mean(c[2] for c in counts):.1f} controls added)")
+
+
+def time_per_call(func, readings, rounds: int) -> float:
+    """Mean seconds per call of func(reading) over all readings."""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for reading in readings:
+            func(reading)
+    return (time.perf_counter() - started) / (rounds * len(readings))
+
+
+async def run(args: argparse.Namespace) -> int:
+    fixtures = load_fixtures(args.fixtures)
+    readings = [reading for _, reading in fixtures]
+
+    conn = RecordingConnection()
+    page = ft.Page(conn, "render-benchmark", asyncio.get_running_loop())
+    app = WeatherApp(page)
+    app.scheduler.stop()
+    await asyncio.sleep(0)
+
+    print(f"Rendering {len(fixtures)} payloads from {args.fixtures.name}")
+    print(f"Weather view: {count_controls(app.weather_container)} controls, "
+          f"page: {count_controls(page)} controls")
+    print("=" * 60)
+
+    failures = {}
+    first, changed, unchanged = [], [], []
+    for name, reading in fixtures:
+        try:
+            # As after an error: the view is hidden and fades back in
+            app.weather_container.visible = False
+            first.append(await render(app, conn, reading))
+            # A refresh that brought no new data
+            unchanged.append(await render(app, conn, reading))
+        except Exception as e:
+            failures[name] = e
+    for _ in range(args.rounds):
+        # Searching city after city while the view stays on screen
+        for name, reading in fixtures:
+            if name in failures:
+                continue
+            try:
+                changed.append(await render(app, conn, reading))
+            except Exception as e:
+                failures[name] = e
+
+    if first:
+        summarize("First render (fade-in)", first)
+    if changed:
+        summarize("Re-render, new payload", changed)
+    if unchanged:
+        summarize("Re-render, same payload", unchanged)
+
+    def alerts(reading):
+        return app.get_weather_alerts(reading, reading.description.title())
+
+    def theme(reading):
+        return app.get_weather_theme(reading.icon, reading.description.title(),
+                                     reading.condition_id)
+
+    rounds = max(args.rounds, 1) * 10
+    print(f"get_weather_alerts: {time_per_call(alerts, readings, rounds) * 1e6:8.2f} us/call")
+    print(f"get_weather_theme:  {time_per_call(theme, readings, rounds) * 1e6:8.2f} us/call")
+
+    if failures:
+        print("=" * 60)
+        for name, e in failures.items():
+            print(f"FAILED {name}: {e!r}")
+
+    await app.weather_service.aclose()
+    return 1 if failures else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES,
+                        help="payload corpus (default: fixtures/owm_payloads.json)")
+    parser.add_argument("--rounds", type=int, default=10,
+                        help="re-renders per payload (default: 10)")
+    args = parser.parse_args()
+    args.fixtures = args.fixtures.resolve()
+
+    # The app saves history and preferences in the working directory; keep
+    # them out of the source tree
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+# resilience.py
+"""Retry backoff and circuit breaker helpers for upstream API calls."""
+
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Capped exponential backoff with full jitter.
+
+    Args:
+        attempt: Zero-based retry number
+        base: Delay before the first retry, in seconds
+        cap: Upper bound for any single delay, in seconds
+
+    Returns:
+        A random delay between 0 and min(cap, base * 2 ** attempt)
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header into a number of seconds.
+
+    Both forms allowed by HTTP are accepted: delta-seconds ("120") and an
+    HTTP date. Returns None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class CircuitBreaker:
+    """
+    Fail fast after repeated upstream failures.
+
+    The breaker opens after failure_threshold consecutive failures. While
+    open, requests are rejected until cooldown seconds have passed; then a
+    single trial request is let through (half-open). A success closes the
+    breaker, a failure opens it again for another cooldown.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_started_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        """Current breaker state."""
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN:
+            return False
+
+        # Half-open: allow one trial at a time (a lost trial expires)
+        now = time.monotonic()
+        if (
+            self._trial_started_at is None
+            or now - self._trial_started_at >= self.cooldown
+        ):
+            self._trial_started_at = now
+            return True
+        return False
+
+    def record_success(self):
+        """Close the breaker after a healthy response."""
+        self.failures = 0
+        self._opened_at = None
+        self._trial_started_at = None
+
+    def record_failure(self):
+        """Count a failure, opening the breaker once the threshold is hit."""
+        self.failures += 1
+        if self._opened_at is not None or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._trial_started_at = None
@@ -0,0 +1,170 @@
+# scheduler.py
+"""Background refresh of watched cities with jittered intervals."""
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+from config import Config
+from models import WeatherReading
+from weather_service import WeatherService, WeatherServiceError
+
+OnRefresh = Callable[[str, WeatherReading], Awaitable[None]]
+
+
+class RefreshScheduler:
+    """
+    Periodically refresh a set of cities through a WeatherService.
+
+    Every city has its own due time. Intervals are jittered so cities (and
+    app instances) started together drift apart instead of hitting the API
+    in bursts, a failing city backs off exponentially, and at most
+    `concurrency` refreshes run at once. While paused nothing is fetched;
+    overdue cities are refreshed on resume.
+
+    With bypass_cache=False a refresh may be answered from the service's
+    cache, which is what sessions sharing one service want: the first
+    session to refresh a city pays for the request, the rest reuse it.
+
+    All methods must be called from the event loop that runs run().
+    """
+
+    def __init__(
+        self,
+        service: WeatherService,
+        on_refresh: OnRefresh,
+        interval: Optional[float] = None,
+        jitter: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        max_backoff: Optional[float] = None,
+        bypass_cache: bool = True,
+    ):
+        self.service = service
+        self.on_refresh = on_refresh
+        self.bypass_cache = bypass_cache
+        self.interval = interval if interval is not None else Config.REFRESH_INTERVAL
+        self.jitter = jitter if jitter is not None else Config.REFRESH_JITTER
+        self.max_backoff = (
+            max_backoff if max_backoff is not None else Config.REFRESH_BACKOFF_MAX
+        )
+        self.concurrency = concurrency or Config.REFRESH_CONCURRENCY
+        self._due: Dict[str, float] = {}  # city -> monotonic due time
+        self._failures: Dict[str, int] = {}
+        self._running = set()  # cities with a refresh in flight
+        self._paused = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def cities(self):
+        """The cities currently being refreshed."""
+        return list(self._due)
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    def _next_delay(self, failures: int = 0) -> float:
+        """Interval for the next refresh, doubled per failure and jittered."""
+        delay = min(self.max_backoff, self.interval * (2 ** failures))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def watch(self, city: str):
+        """Start refreshing a city one (jittered) interval from now."""
+        if city and city not in self._due:
+            self._due[city] = time.monotonic() + self._next_delay()
+            self._wake()
+
+    def watch_many(self, cities: Iterable[str]):
+        """Watch several cities at once."""
+        for city in cities:
+            self.watch(city)
+
+    def unwatch(self, city: str):
+        """Stop refreshing a city."""
+        self._due.pop(city, None)
+        self._failures.pop(city, None)
+
+    def pause(self):
+        """Stop refreshing until resume() is called."""
+        self._paused = True
+
+    def resume(self):
+        """Continue refreshing; cities that became due meanwhile go first."""
+        if self._paused:
+            self._paused = False
+            self._wake()
+
+    async def _refresh(self, city: str, semaphore: asyncio.Semaphore):
+        """Refresh one city and schedule its next run."""
+        try:
+            async with semaphore:
+                if self._paused or city not in self._due:
+                    return
+                try:
+                    reading = await self.service.get_weather(
+                        city, refresh=self.bypass_cache
+                    )
+                except WeatherServiceError as e:
+                    failures = self._failures.get(city, 0) + 1
+                    self._failures[city] = failures
+                    if city in self._due:
+                        self._due[city] = time.monotonic() + self._next_delay(failures)
+                    print(f"Error refreshing {city}: {e}")
+                    return
+
+                self._failures.pop(city, None)
+                if city in self._due:
+                    self._due[city] = time.monotonic() + self._next_delay()
+                try:
+                    await self.on_refresh(city, reading)
+                except Exception as e:
+                    print(f"Error handling refresh of {city}: {e}")
+        finally:
+            self._running.discard(city)
+            self._wake()
+
+    async def run(self):
+        """Refresh due cities until cancelled (run this as a task)."""
+        self._task = asyncio.current_task()
+        self._wakeup = asyncio.Event()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        try:
+            while True:
+                self._wakeup.clear()
+                timeout = None
+                if not self._paused:
+                    now = time.monotonic()
+                    for city, due in list(self._due.items()):
+                        if city in self._running:
+                            continue
+                        if due <= now:
+                            # Marked as running until it has been rescheduled
+                            self._running.add(city)
+                            task = asyncio.ensure_future(self._refresh(city, semaphore))
+                            tasks.add(task)
+                            task.add_done_callback(tasks.discard)
+                        elif timeout is None or due - now < timeout:
+                            timeout = due - now
+
+                # Sleep until the next city is due or the schedule changes
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._running.clear()
+            self._task = None
+
+    def stop(self):
+        """Cancel run() and any refreshes in flight."""
+        if self._task is not None:
+            self._task.cancel()
@@ -0,0 +1,65 @@
+# singleflight.py
+"""Request coalescing for concurrent identical lookups."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Share one in-flight task between concurrent callers of the same key."""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run factory() once per key, no matter how many callers are waiting.
+
+        The first caller for a key starts the task; later callers await the
+        same task until it finishes. The result, or the exception, is
+        delivered to every waiter. A cancelled caller leaves the task
+        running for the others; once the last waiter has been cancelled
+        the task is cancelled too, so abandoned requests don't hold a
+        connection.
+
+        Args:
+            key: Identity of the request
+            factory: Zero-argument coroutine function doing the actual work
+
+        Returns:
+            The result of factory()
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._finish(k, t))
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        cancelled = False
+        try:
+            # Shield so one cancelled waiter does not cancel the shared task
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            remaining = self._waiters[task] - 1
+            if remaining:
+                self._waiters[task] = remaining
+            else:
+                del self._waiters[task]
+                if cancelled and not task.done():
+                    task.cancel()
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        """Forget a finished task so the next call starts a fresh one."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every waiter went away
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
@@ -0,0 +1,378 @@
+# storage.py
+"""Local persistence for search history and preferences.
+
+Writes are coalesced: callers mark data as changed and a timer thread
+writes it once the changes settle, so a burst of clicks costs one write
+and the UI never waits for the disk. Files are replaced atomically, so a
+crash mid-write leaves the previous version intact. In server mode each
+user's documents live in one shared SQLite database instead of files.
+"""
+
+import bisect
+import json
+import math
+import os
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from itertools import chain, islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+
+def _umask() -> int:
+    """The process umask (it can only be read by setting it)."""
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# Mode a plain open() would give a new file
+DEFAULT_FILE_MODE = 0o666 & ~_umask()
+
+
+def write_json_atomic(path: Path, data: Any):
+    """Write JSON to a temp file next to path, then rename it over path."""
+    fd, temp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file 0600; keep the mode the file had
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = DEFAULT_FILE_MODE
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class JsonStore:
+    """A JSON file written in the background after changes settle."""
+
+    def __init__(self, path: Union[str, Path], delay: float = 1.0):
+        self.path = Path(path)
+        self.delay = delay
+        self._lock = threading.Lock()  # guards the pending source and timer
+        self._write_lock = threading.Lock()  # one write at a time
+        self._timer: Optional[threading.Timer] = None
+        self._source: Optional[Callable[[], Any]] = None
+        self._version = 0  # snapshots taken
+        self._written = 0  # newest snapshot on disk
+
+    def load(self, default: Any) -> Any:
+        """Read the file, or return default if it is missing or unreadable."""
+        try:
+            return self._read()
+        except FileNotFoundError:
+            return default
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"Error loading {self.path}: {e}")
+            return default
+
+    def _read(self) -> Any:
+        """Read the stored document; FileNotFoundError if there is none."""
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write(self, data: Any):
+        """Replace the stored document."""
+        write_json_atomic(self.path, data)
+
+    def save(self, source: Callable[[], Any]):
+        """
+        Schedule a write; source() is called at write time for the data.
+
+        Further calls within `delay` seconds restart the timer, so only
+        the final state is written.
+        """
+        with self._lock:
+            self._source = source
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = False  # let a pending write finish on exit
+            self._timer.start()
+
+    def flush(self):
+        """Write any pending change now (also called on shutdown)."""
+        # Only the snapshot is taken under _lock, so save() (called from
+        # the event loop) never waits for serialization or fsync
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            source, self._source = self._source, None
+            if source is None:
+                return
+            try:
+                data = source()
+            except Exception as e:
+                print(f"Error saving {self.path}: {e}")
+                return
+            self._version += 1
+            version = self._version
+
+        with self._write_lock:
+            # A later snapshot may have been written while we waited
+            if version < self._written:
+                return
+            try:
+                self._write(data)
+                self._written = version
+            except Exception as e:
+                print(f"Error saving {self.path}: {e}")
+
+
+class SessionDatabase:
+    """
+    Per-user JSON documents (history, preferences) in one SQLite file.
+
+    Used when many sessions share a process, so users don't overwrite each
+    other's files and writes are serialized by SQLite instead of racing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    user_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (user_id, name)
+                )
+                """
+            )
+            self._conn.commit()
+
+    def get(self, user_id: str, name: str) -> Optional[str]:
+        """Return the raw JSON document, or None if it was never saved."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM documents WHERE user_id = ? AND name = ?",
+                (user_id, name),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, user_id: str, name: str, data: str):
+        """Store (or replace) a user's JSON document."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (user_id, name, data, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (user_id, name, data, time.time()),
+            )
+            self._conn.commit()
+
+    def store(self, user_id: str, name: str, delay: float = 1.0) -> "SessionJsonStore":
+        """A JsonStore-compatible view of one user's document."""
+        return SessionJsonStore(self, user_id, name, delay)
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class SessionJsonStore(JsonStore):
+    """One user's document in a SessionDatabase, with JsonStore batching."""
+
+    def __init__(self, database: SessionDatabase, user_id: str, name: str,
+                 delay: float = 1.0):
+        super().__init__(f"{database.path}#{user_id}/{name}", delay)
+        self.database = database
+        self.user_id = user_id
+        self.name = name
+
+    def _read(self) -> Any:
+        raw = self.database.get(self.user_id, self.name)
+        if raw is None:
+            raise FileNotFoundError(self.path)
+        return json.loads(raw)
+
+    def _write(self, data: Any):
+        self.database.put(self.user_id, self.name, json.dumps(data))
+
+
+class SearchHistory:
+    """
+    Recently searched cities, most recent first, at most max_items.
+
+    Entries are kept in an OrderedDict keyed by the lowercased city name,
+    so adding, re-searching (moving to the front) and removing a city are
+    O(1). A ranking (see ranked()) is maintained alongside, so reading the
+    best entries never scores or sorts the whole history. Iteration yields
+    {"city", "timestamp", "count"} dicts, the same shape as the JSON file,
+    plus "query" when the city was looked up under a different name (e.g.
+    "London,GB" or a picked suggestion).
+    """
+
+    # Weight of a search halves every this many days when ranking
+    HALF_LIFE_DAYS = 7
+
+    def __init__(self, items: Iterable[Dict] = (), max_items: int = 10):
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        # Oldest first internally, so the newest entry is at the end
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        # Ascending (-rank, -sequence, key), i.e. best first; _ranks holds
+        # each key's current tuple so it can be found and removed
+        self._ranking: List[tuple] = []
+        self._ranks: Dict[str, tuple] = {}
+        self._sequence = 0
+        for item in reversed(list(items)):
+            city = item.get("city", "") if isinstance(item, dict) else ""
+            if city:
+                self._add(city, item.get("timestamp", ""), item.get("count", 1),
+                          item.get("query"))
+
+    @staticmethod
+    def key(city: str) -> str:
+        """Lookup key for a city name (case and whitespace insensitive)."""
+        return " ".join(city.lower().split())
+
+    def _rank(self, timestamp: str, count: int) -> float:
+        """
+        Ranking key of an entry: log2 of its decayed weight, shifted by a
+        constant. count * 0.5 ** (age / half-life) orders entries the same
+        at any "now", so the key can be computed once per change.
+        """
+        half_life = self.HALF_LIFE_DAYS * 86400
+        try:
+            searched_at = datetime.fromisoformat(timestamp).timestamp()
+        except (TypeError, ValueError):
+            # Unknown time: weigh it as four half-lives old
+            searched_at = time.time() - 4 * half_life
+        return math.log2(max(count, 1)) + searched_at / half_life
+
+    def _unrank(self, key: str):
+        rank = self._ranks.pop(key, None)
+        if rank is not None:
+            del self._ranking[bisect.bisect_left(self._ranking, rank)]
+
+    def _add(self, city: str, timestamp: str, count: int, query: Optional[str] = None):
+        key = self.key(city)
+        entry = {"city": city, "timestamp": timestamp, "count": count}
+        if query and query != city:
+            entry["query"] = query
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+
+        self._unrank(key)
+        self._sequence += 1
+        rank = (-self._rank(timestamp, count), -self._sequence, key)
+        self._ranks[key] = rank
+        bisect.insort(self._ranking, rank)
+
+        while len(self._entries) > self.max_items:
+            oldest, _ = self._entries.popitem(last=False)
+            self._unrank(oldest)
+
+    def add(self, city: str, timestamp: Optional[str] = None, query: Optional[str] = None):
+        """
+        Add a city, or move it to the front if already present.
+
+        Args:
+            city: Name to show (as returned by the API)
+            timestamp: ISO time of the search (default: now)
+            query: What was sent to the API, if different from city
+        """
+        if timestamp is None:
+            timestamp = datetime.now().isoformat()
+        with self._lock:
+            previous = self._entries.get(self.key(city))
+            count = previous["count"] + 1 if previous else 1
+            self._add(city, timestamp, count, query)
+
+    def remove(self, city: str):
+        """Remove a city (case-insensitive); unknown cities are ignored."""
+        key = self.key(city)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._unrank(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._ranking.clear()
+            self._ranks.clear()
+
+    def latest(self) -> Optional[str]:
+        """The most recently searched city, or None."""
+        with self._lock:
+            if not self._entries:
+                return None
+            return next(reversed(self._entries.values()))["city"]
+
+    def latest_query(self) -> Optional[str]:
+        """What was sent to the API for the most recent search, or None."""
+        with self._lock:
+            if not self._entries:
+                return None
+            entry = next(reversed(self._entries.values()))
+            return entry.get("query") or entry["city"]
+
+    def __contains__(self, city: str) -> bool:
+        return self.key(city) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.to_list())
+
+    def to_list(self):
+        """Entries most recent first, as stored in the JSON file."""
+        with self._lock:
+            return [dict(item) for item in reversed(self._entries.values())]
+
+    def recent(self, limit: int) -> List[Dict]:
+        """The `limit` most recent entries, without copying the rest."""
+        with self._lock:
+            return [dict(item) for item in islice(reversed(self._entries.values()), limit)]
+
+    def ranked(self, limit: Optional[int] = None, start: int = 0) -> List[Dict]:
+        """
+        Entries ordered by how often and how recently they were searched.
+
+        Each search counts for less as it ages (see HALF_LIFE_DAYS), so a
+        city searched daily outranks one searched often a month ago. The
+        latest search always comes first, so a new city shows up at once.
+        The ranking is kept up to date as entries change, so this costs
+        O(start + limit), not a sort of the whole history.
+
+        Args:
+            limit: Return at most `limit` entries
+            start: Skip the best `start` entries (for showing a window)
+
+        Returns:
+            Entries, best first; ties keep the most recent first
+        """
+        with self._lock:
+            if not self._entries:
+                return []
+            latest = next(reversed(self._entries))
+            ordered = chain(
+                [latest],
+                (key for _, _, key in self._ranking if key != latest),
+            )
+            stop = None if limit is None else start + limit
+            return [dict(self._entries[key]) for key in islice(ordered, start, stop)]
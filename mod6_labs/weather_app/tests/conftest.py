@@ -0,0 +1,13 @@
+# tests/conftest.py
+"""Make the app's flat modules importable and keep tests offline."""
+
+import os
+import sys
+from pathlib import Path
+
+# The app imports its modules by bare name (from config import Config)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Tests must not need a real key or touch the on-disk cache
+os.environ.setdefault("OPENWEATHER_API_KEY", "test")
+os.environ.setdefault("WEATHER_CACHE_DB", "")
@@ -0,0 +1,101 @@
+# tests/test_alerts.py
+"""Alert rules: scalar and batch paths against the original if-chain."""
+
+import json
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from alerts import DEFAULT_ENGINE
+from conditions import CATEGORY_NAMES
+from models import WeatherReading
+
+APP_DIR = Path(__file__).resolve().parent.parent
+FIXTURES = APP_DIR / "fixtures" / "owm_payloads.json"
+
+
+def if_chain_titles(temp, humidity, wind_speed, description):
+    """Alert titles as produced by the original get_weather_alerts."""
+    titles = []
+    text = description.lower()
+    if temp >= 35:
+        titles.append("Extreme Heat Warning")
+    elif temp >= 30:
+        titles.append("High Temperature")
+    elif temp <= 0:
+        titles.append("Freezing Temperature")
+    elif temp <= 5:
+        titles.append("Cold Weather")
+    if "thunder" in text or "storm" in text:
+        titles.append("Thunderstorm Alert")
+    elif "rain" in text or "drizzle" in text:
+        titles.append("Rain Expected")
+    elif "snow" in text:
+        titles.append("Snow Alert")
+    if wind_speed >= 15:
+        titles.append("High Wind Warning")
+    if humidity >= 80:
+        titles.append("High Humidity")
+    if "fog" in text or "mist" in text:
+        titles.append("Low Visibility")
+    return titles
+
+
+def descriptions():
+    """Every description in the payload corpus."""
+    with open(FIXTURES, encoding="utf-8") as f:
+        cases = json.load(f)["cases"]
+    found = set()
+    for case in cases:
+        for weather in case["payload"].get("weather") or []:
+            found.add(weather.get("description", ""))
+    return sorted(found)
+
+
+def random_values(rng):
+    """Temperature, humidity and wind, biased towards rule boundaries."""
+    temp = rng.choice([rng.uniform(-60, 55), 35, 30, 5, 0, 34.99, 0.01, float("nan")])
+    humidity = rng.choice([rng.uniform(0, 100), 80, 79.99, float("nan")])
+    wind = rng.choice([rng.uniform(0, 60), 15, 14.99, float("nan")])
+    return temp, humidity, wind
+
+
+def test_match_agrees_with_evaluate():
+    rng = random.Random(12)
+    for _ in range(5000):
+        temp, humidity, wind = random_values(rng)
+        category = rng.randrange(len(CATEGORY_NAMES))
+        row = DEFAULT_ENGINE.evaluate([temp], [humidity], [wind], [category])[0]
+        assert DEFAULT_ENGINE.match(temp, humidity, wind, category) == list(np.flatnonzero(row))
+
+
+@pytest.mark.parametrize("description", descriptions())
+def test_alerts_for_agrees_with_the_if_chain(description):
+    # No condition ID or icon, so the description decides, as it used to
+    rng = random.Random(description)
+    for _ in range(200):
+        temp, humidity, wind = random_values(rng)
+        reading = WeatherReading.from_payload({
+            "main": {"temp": temp, "humidity": humidity},
+            "wind": {"speed": wind},
+            "weather": [{"id": 0, "description": description, "icon": ""}],
+        })
+        alerts = DEFAULT_ENGINE.alerts_for(reading, description.title())
+        expected = if_chain_titles(temp, humidity, wind, description)
+        assert [alert["title"] for alert in alerts] == expected
+
+
+def test_single_reading_path_does_not_load_numpy():
+    script = (
+        "import sys\n"
+        "from alerts import DEFAULT_ENGINE\n"
+        "from models import WeatherReading\n"
+        "reading = WeatherReading.from_payload({'main': {'temp': 40}})\n"
+        "assert DEFAULT_ENGINE.alerts_for(reading, '')\n"
+        "assert 'numpy' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=APP_DIR, check=True)
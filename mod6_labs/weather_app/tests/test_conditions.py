@@ -0,0 +1,56 @@
+# tests/test_conditions.py
+"""Category, theme and condition alert for every OWM condition ID."""
+
+import pytest
+
+from alerts import DEFAULT_ENGINE
+from conditions import CATEGORY_NAMES, classify
+from models import WeatherReading
+from themes import theme_for
+
+# Every condition ID listed at https://openweathermap.org/weather-conditions
+EXPECTED_CATEGORY = {
+    "thunderstorm": [200, 201, 202, 210, 211, 212, 221, 230, 231, 232],
+    "rain": [300, 301, 302, 310, 311, 312, 313, 314, 321,
+             500, 501, 502, 503, 504, 511, 520, 521, 522, 531],
+    "snow": [600, 601, 602, 611, 612, 613, 615, 616, 620, 621, 622],
+    "mist": [701, 741],
+    "haze": [721],
+    "other": [711, 731, 751, 761, 762, 771, 781],
+    "clear": [800],
+    "few_clouds": [801],
+    "clouds": [802, 803, 804],
+}
+CASES = [
+    (condition_id, category)
+    for category, ids in EXPECTED_CATEGORY.items()
+    for condition_id in ids
+]
+
+
+@pytest.mark.parametrize("condition_id,category", CASES)
+def test_category_by_id(condition_id, category):
+    assert CATEGORY_NAMES[classify(condition_id)] == category
+
+
+def reading(condition_id, description):
+    return WeatherReading.from_payload({
+        # Mild values, so only the condition can raise an alert
+        "main": {"temp": 15, "humidity": 50},
+        "wind": {"speed": 2},
+        "weather": [{"id": condition_id, "description": description, "icon": "13d"}],
+    })
+
+
+@pytest.mark.parametrize("condition_id,description", [
+    (611, "sleet"),
+    (612, "light shower sleet"),
+    (613, "shower sleet"),
+    (615, "light rain and snow"),
+    (616, "rain and snow"),
+])
+def test_sleet_and_rain_and_snow_are_snow(condition_id, description):
+    # Deliberate change from the old text matching, see conditions.py
+    assert theme_for(condition_id, "13d", description).emoji == "❄️"
+    alerts = DEFAULT_ENGINE.alerts_for(reading(condition_id, description), description)
+    assert [alert["title"] for alert in alerts] == ["Snow Alert"]
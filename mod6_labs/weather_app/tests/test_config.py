@@ -0,0 +1,43 @@
+# tests/test_config.py
+"""Environment and .env precedence."""
+
+import pytest
+
+import config
+from config import Config
+
+
+@pytest.fixture
+def dotenv(tmp_path, monkeypatch):
+    """A .env file used instead of the project's, and a clean Config."""
+    path = tmp_path / ".env"
+    path.write_text("")
+    monkeypatch.setattr(config, "find_dotenv", lambda: str(path))
+    monkeypatch.setattr(Config, "_settings", None)
+    monkeypatch.setattr(Config, "_dotenv_names", set())
+    for name in ("OPENWEATHER_API_KEY", "WEATHER_CACHE_TTL"):
+        monkeypatch.delenv(name, raising=False)
+    yield path
+    # Undo what .env put into the environment
+    for name in Config._dotenv_names:
+        monkeypatch.delenv(name, raising=False)
+    Config._settings = None
+
+
+def test_environment_wins_before_and_after_reload(dotenv, monkeypatch):
+    dotenv.write_text("OPENWEATHER_API_KEY=from-file\n")
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "from-env")
+    assert Config.API_KEY == "from-env"
+    Config.reload()
+    assert Config.API_KEY == "from-env"
+
+
+def test_reload_picks_up_dotenv_edits(dotenv):
+    dotenv.write_text("OPENWEATHER_API_KEY=first\nWEATHER_CACHE_TTL=60\n")
+    assert Config.API_KEY == "first"
+    assert Config.CACHE_TTL == 60
+
+    dotenv.write_text("OPENWEATHER_API_KEY=second\n")
+    Config.reload()
+    assert Config.API_KEY == "second"
+    assert Config.CACHE_TTL != 60  # back to the default once removed
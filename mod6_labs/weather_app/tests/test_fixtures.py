@@ -0,0 +1,37 @@
+# tests/test_fixtures.py
+"""Expected category, theme and alerts for the recorded OWM payloads."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from alerts import DEFAULT_ENGINE
+from conditions import CATEGORY_NAMES, classify
+from models import WeatherReading
+from themes import theme_for
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures" / "owm_payloads.json"
+
+with open(FIXTURES, encoding="utf-8") as f:
+    CASES = json.load(f)["cases"]
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case["name"] for case in CASES])
+def test_expected_outputs(case):
+    expected = case["expected"]
+    reading = WeatherReading.from_payload(case["payload"])
+    description = reading.description.title()
+
+    category = classify(reading.condition_id, reading.icon, description)
+    assert CATEGORY_NAMES[category] == expected["category"]
+    theme = theme_for(reading.condition_id, reading.icon, description)
+    assert theme.emoji == expected["theme"]
+
+    matched = DEFAULT_ENGINE.match(
+        reading.temp, reading.humidity, reading.wind_speed, category
+    )
+    assert [DEFAULT_ENGINE.codes[j] for j in matched] == expected["alerts"]
+    # The batch path must agree
+    (codes,) = DEFAULT_ENGINE.codes_for(DEFAULT_ENGINE.evaluate_readings([reading]))
+    assert list(codes) == expected["alerts"]
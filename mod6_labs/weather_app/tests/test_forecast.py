@@ -0,0 +1,59 @@
+# tests/test_forecast.py
+"""Daily rollups of forecast series."""
+
+import numpy as np
+
+from forecast import ForecastSeries, daily_rollup, daily_rollups
+
+DAY = 86400
+START = 1700006400  # 2023-11-15 00:00 UTC
+
+
+def make_series(temp, humidity=None, wind=None, hours=3, timezone=0):
+    n = len(temp)
+    return ForecastSeries(
+        name="Test",
+        country="XX",
+        timezone=timezone,
+        timestamps=START + np.arange(n, dtype=np.int64) * hours * 3600,
+        temp=np.array(temp, dtype=float),
+        humidity=np.array(humidity if humidity is not None else [50.0] * n, dtype=float),
+        wind_speed=np.array(wind if wind is not None else [1.0] * n, dtype=float),
+    )
+
+
+def test_day_with_a_missing_sample():
+    temp = [10.0, 12.0, np.nan, 16.0, 18.0, 14.0, 12.0]
+    humidity = [40.0, np.nan, 60.0, 60.0, 60.0, 60.0, 40.0]
+    rollup = daily_rollup(make_series(temp, humidity))
+
+    assert len(rollup) == 1
+    assert rollup.count[0] == 6
+    assert rollup.temp_min[0] == 10.0
+    assert rollup.temp_max[0] == 18.0
+    assert rollup.temp_mean[0] == np.mean([10.0, 12.0, 16.0, 18.0, 14.0, 12.0])
+    assert rollup.humidity_mean[0] == np.mean([40.0, 60.0, 60.0, 60.0, 60.0, 40.0])
+
+
+def test_day_without_any_temperature():
+    rollup = daily_rollup(make_series([np.nan, np.nan]))
+    assert rollup.count[0] == 0
+    assert np.isnan(rollup.temp_mean[0])
+    assert rollup.humidity_mean[0] == 50.0
+
+
+def test_groups_by_local_day_and_series():
+    # 16 points every 3 hours: two full UTC days
+    first = make_series(np.arange(16.0))
+    # Three hours behind UTC: the first point falls on the previous day
+    second = make_series(np.arange(16.0), timezone=-3 * 3600)
+    rollup = daily_rollups([first, second])
+
+    assert list(rollup.series_index) == [0, 0, 1, 1, 1]
+    assert list(rollup.count) == [8, 8, 1, 8, 7]
+    assert list(rollup.temp_max[:2]) == [7.0, 15.0]
+    assert rollup.day[0] == np.datetime64(START // DAY, "D")
+
+
+def test_empty_input():
+    assert len(daily_rollups([])) == 0
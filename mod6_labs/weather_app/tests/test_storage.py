@@ -0,0 +1,49 @@
+# tests/test_storage.py
+"""Batched JSON persistence."""
+
+import json
+import stat
+import threading
+import time
+
+from storage import DEFAULT_FILE_MODE, JsonStore, write_json_atomic
+
+
+def test_save_does_not_wait_for_a_write_in_progress(tmp_path):
+    store = JsonStore(tmp_path / "data.json", delay=0.01)
+    writing = threading.Event()
+    release = threading.Event()
+    write = store._write
+
+    def slow_write(data):
+        writing.set()
+        release.wait(5)
+        write(data)
+
+    store._write = slow_write
+    store.save(lambda: {"version": 1})
+    assert writing.wait(5)
+
+    started = time.perf_counter()
+    store.save(lambda: {"version": 2})
+    assert time.perf_counter() - started < 0.1
+
+    release.set()
+    store.flush()
+    time.sleep(0.1)
+    assert json.loads((tmp_path / "data.json").read_text()) == {"version": 2}
+
+
+def test_atomic_write_keeps_the_file_mode(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text("[]")
+    path.chmod(0o640)
+    write_json_atomic(path, [1])
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+    assert json.loads(path.read_text()) == [1]
+
+
+def test_atomic_write_creates_files_like_open(tmp_path):
+    path = tmp_path / "new.json"
+    write_json_atomic(path, {})
+    assert stat.S_IMODE(path.stat().st_mode) == DEFAULT_FILE_MODE
@@ -10,8 +10,8 @@ async def test_valid_city():
     service = WeatherService()
     try:
         data = await service.get_weather("London")
-        print(f"✅ Successfully fetched weather for {data['name']}")
-        print(f"   Temperature: {data['main']['temp']}°C")
+        print(f"✅ Successfully fetched weather for {data.name}")
+        print(f"   Temperature: {data.temp}°C")
         return True
     except Exception as e:
         print(f"❌ Test failed: {e}")
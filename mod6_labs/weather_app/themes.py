@@ -0,0 +1,69 @@
+# themes.py
+"""Weather condition themes (colors and emoji), defined once as data."""
+
+from typing import Dict, NamedTuple
+
+import flet as ft
+
+from conditions import (
+    CLEAR,
+    CLOUDS,
+    FEW_CLOUDS,
+    HAZE,
+    MIST,
+    OTHER,
+    RAIN,
+    SNOW,
+    THUNDERSTORM,
+    classify,
+)
+
+
+class WeatherTheme(NamedTuple):
+    """Immutable set of colors and emoji for one weather condition."""
+
+    bg_color: str
+    card_color: str
+    emoji: str
+    accent_color: str
+
+
+_MIST_THEME = WeatherTheme(
+    ft.Colors.BLUE_GREY_200, ft.Colors.BLUE_GREY_50, "🌫️", ft.Colors.BLUE_GREY_600
+)
+
+THEMES: Dict[int, WeatherTheme] = {
+    CLEAR: WeatherTheme(
+        ft.Colors.AMBER_100, ft.Colors.AMBER_50, "☀️", ft.Colors.ORANGE_700
+    ),
+    FEW_CLOUDS: WeatherTheme(
+        ft.Colors.BLUE_GREY_100, ft.Colors.BLUE_GREY_50, "🌤️", ft.Colors.BLUE_GREY_700
+    ),
+    CLOUDS: WeatherTheme(
+        ft.Colors.GREY_300, ft.Colors.GREY_100, "☁️", ft.Colors.GREY_700
+    ),
+    RAIN: WeatherTheme(
+        ft.Colors.BLUE_200, ft.Colors.BLUE_50, "🌧️", ft.Colors.BLUE_800
+    ),
+    THUNDERSTORM: WeatherTheme(
+        ft.Colors.INDIGO_300, ft.Colors.INDIGO_50, "⛈️", ft.Colors.INDIGO_900
+    ),
+    SNOW: WeatherTheme(
+        ft.Colors.CYAN_100, ft.Colors.CYAN_50, "❄️", ft.Colors.CYAN_700
+    ),
+    MIST: _MIST_THEME,
+    HAZE: _MIST_THEME,
+    # Default theme
+    OTHER: WeatherTheme(
+        ft.Colors.BLUE_100, ft.Colors.BLUE_50, "🌈", ft.Colors.BLUE_700
+    ),
+}
+
+
+def theme_for(
+    condition_id: int = 0,
+    icon: str = "",
+    description: str = "",
+) -> WeatherTheme:
+    """Return the shared theme for a weather condition."""
+    return THEMES[classify(condition_id, icon, description)]
@@ -0,0 +1,139 @@
+# weather_cli.py
+"""Fetch current weather for many cities and print NDJSON or CSV.
+
+Headless entry point for cron and batch jobs; it only imports the service
+layer (no Flet, no NumPy). Cities come from the arguments, a file (one per
+line) or stdin, and results are written as soon as each city finishes.
+Only results go to stdout; diagnostics go to stderr. Nothing is cached on
+disk unless --cache-db is given, so concurrent jobs don't share (or lock)
+a database and every run reports fresh data.
+
+    python weather_cli.py London Paris Tokyo
+    python weather_cli.py --file cities.txt --format csv > weather.csv
+    cat cities.txt | python weather_cli.py --concurrency 50
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import sys
+from dataclasses import asdict, fields
+from typing import Iterable, List, Optional, TextIO
+
+from config import Config
+from models import WeatherReading
+from weather_service import WeatherService, WeatherServiceError
+from weather_store import WeatherStore
+
+FIELDS = [field.name for field in fields(WeatherReading)]
+
+
+def read_cities(lines: Iterable[str]) -> List[str]:
+    """One city per line; blank lines and # comments are skipped."""
+    cities = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            cities.append(line)
+    return cities
+
+
+class NdjsonWriter:
+    """One JSON object per line: the reading's fields, or an error."""
+
+    def __init__(self, out: TextIO):
+        self.out = out
+
+    def write(self, city: str, reading: Optional[WeatherReading],
+              error: Optional[WeatherServiceError]):
+        if reading is not None:
+            record = {"query": city, **asdict(reading)}
+        else:
+            record = {"query": city, "error": str(error)}
+        self.out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.out.flush()
+
+
+class CsvWriter:
+    """CSV with a header row; failed cities only fill query and error."""
+
+    def __init__(self, out: TextIO):
+        self.out = out
+        self._writer = csv.DictWriter(out, ["query", *FIELDS, "error"])
+        self._writer.writeheader()
+
+    def write(self, city: str, reading: Optional[WeatherReading],
+              error: Optional[WeatherServiceError]):
+        if reading is not None:
+            self._writer.writerow({"query": city, **asdict(reading)})
+        else:
+            self._writer.writerow({"query": city, "error": str(error)})
+        self.out.flush()
+
+
+WRITERS = {"ndjson": NdjsonWriter, "csv": CsvWriter}
+
+
+async def run(cities: List[str], output_format: str, concurrency: Optional[int],
+              out: TextIO = sys.stdout, cache_db: Optional[str] = None) -> int:
+    """
+    Fetch all cities and stream the results.
+
+    Args:
+        cache_db: SQLite file to cache results in (default: memory only)
+
+    Returns:
+        The number of cities that failed
+    """
+    writer = WRITERS[output_format](out)
+    failures = 0
+    store = WeatherStore(cache_db) if cache_db else None
+    async with WeatherService(store=store, persistent=False) as service:
+        async for city, reading, error in service.get_weather_many(cities, concurrency):
+            if error is not None:
+                failures += 1
+            writer.write(city, reading, error)
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cities", nargs="*",
+                        help="city names (default: read from --file or stdin)")
+    parser.add_argument("-f", "--file", type=argparse.FileType("r", encoding="utf-8"),
+                        help="file with one city per line ('-' for stdin)")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="ndjson",
+                        help="output format (default: ndjson)")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="lookups in flight at once (default: connection pool size)")
+    parser.add_argument("--cache-db", default=None,
+                        help="cache results in this SQLite file across runs "
+                             "(default: no disk cache)")
+    args = parser.parse_args(argv)
+
+    cities = list(args.cities)
+    if args.file is not None:
+        cities.extend(read_cities(args.file))
+    elif not cities and not sys.stdin.isatty():
+        cities = read_cities(sys.stdin)
+    if not cities:
+        parser.error("no cities given")
+
+    try:
+        Config.validate()
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    try:
+        failures = asyncio.run(
+            run(cities, args.format, args.concurrency, cache_db=args.cache_db)
+        )
+    except KeyboardInterrupt:
+        return 130
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,32 +1,302 @@
 # weather_service.py
 """Weather API service layer."""
 
+import asyncio
+import importlib.util
+import sys
+import time
 import httpx
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+from cache import TTLCache
 from config import Config
+from metrics import REGISTRY, MetricsRegistry, make_event_hooks
+from models import WeatherReading, loads
+from resilience import CircuitBreaker, backoff_delay, parse_retry_after
+from singleflight import SingleFlight
+from weather_store import WeatherStore
 
 
 class WeatherServiceError(Exception):
     """Custom exception for weather service errors."""
     pass
 
+
+class CityNotFoundError(WeatherServiceError):
+    """The API does not know the requested city (HTTP 404)."""
+    pass
+
 class WeatherService:
     """Service for fetching weather data from OpenWeatherMap API."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[TTLCache] = None,
+        store: Optional[WeatherStore] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        persistent: bool = True,
+    ):
+        """
+        Args:
+            client: Shared HTTP client (default: a pooled client of our own)
+            cache: In-memory cache (default: from Config.CACHE_TTL)
+            store: On-disk store (default: Config.CACHE_DB if persistent)
+            metrics: Registry for request metrics (default: the global one)
+            persistent: With no store given, whether to open Config.CACHE_DB;
+                False keeps everything in memory
+        """
+        Config.validate()
         self.api_key = Config.API_KEY
         self.base_url = Config.BASE_URL
         self.timeout = Config.TIMEOUT
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self._client = client
+        self._owns_client = client is None
+        if client is not None:
+            for event, hooks in make_event_hooks(self.metrics).items():
+                client.event_hooks[event].extend(hooks)
+        if cache is None:
+            cache = TTLCache(Config.CACHE_TTL, Config.CACHE_MAX_ENTRIES)
+        self.cache = cache
+        if store is None and persistent and Config.CACHE_DB:
+            store = WeatherStore(Config.CACHE_DB)
+        self.store = store
+        self._city_ids: Dict[str, int] = {}  # normalized name -> OWM city ID
+        self._inflight = SingleFlight()
+        self.breaker = CircuitBreaker(
+            Config.CIRCUIT_FAILURE_THRESHOLD,
+            Config.CIRCUIT_COOLDOWN,
+        )
+        self._register_gauges()
+        self._pending_writes = set()
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared pooled client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            limits = httpx.Limits(
+                max_connections=Config.MAX_CONNECTIONS,
+                max_keepalive_connections=Config.MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=Config.KEEPALIVE_EXPIRY,
+            )
+            # HTTP/2 needs the optional "h2" package (httpx[http2])
+            http2 = Config.HTTP2 and importlib.util.find_spec("h2") is not None
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=limits,
+                http2=http2,
+                event_hooks=make_event_hooks(self.metrics),
+            )
+            self._owns_client = True
+        return self._client
+    
+    def _register_gauges(self):
+        """Expose cache and circuit breaker state through the metrics registry."""
+        cache, breaker = self.cache, self.breaker
+        
+        def hit_ratio():
+            lookups = cache.hits + cache.misses
+            return cache.hits / lookups if lookups else 0.0
+        
+        self.metrics.register_gauge("weather_cache_hits", lambda: cache.hits)
+        self.metrics.register_gauge("weather_cache_misses", lambda: cache.misses)
+        self.metrics.register_gauge("weather_cache_evictions", lambda: cache.evictions)
+        self.metrics.register_gauge("weather_cache_size", lambda: len(cache))
+        self.metrics.register_gauge("weather_cache_hit_ratio", hit_ratio)
+        self.metrics.register_gauge(
+            "weather_circuit_open",
+            lambda: 0 if breaker.state == breaker.CLOSED else 1,
+        )
+    
+    async def aclose(self):
+        """Close the pooled HTTP client and release its connections."""
+        # Let queued disk writes finish so the last results survive a restart
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+        self._client = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
+    @staticmethod
+    def normalize_city(city: str) -> str:
+        """Case and whitespace insensitive form of a city name."""
+        return " ".join(city.lower().split())
+    
+    @classmethod
+    def city_cache_key(cls, city: str) -> tuple:
+        """Cache key for a city lookup (case and whitespace insensitive)."""
+        return ("city", cls.normalize_city(city), Config.UNITS)
+    
+    @staticmethod
+    def city_id_cache_key(city_id: int) -> tuple:
+        """Cache key for a lookup by OpenWeatherMap city ID."""
+        return ("id", int(city_id), Config.UNITS)
+    
+    @staticmethod
+    def coordinates_cache_key(lat: float, lon: float) -> tuple:
+        """Cache key for a coordinate lookup, rounded to Config.COORD_PRECISION."""
+        return (
+            "coords",
+            round(lat, Config.COORD_PRECISION),
+            round(lon, Config.COORD_PRECISION),
+            Config.UNITS,
+        )
+    
+    async def _lookup(
+        self,
+        cache_key: tuple,
+        fetch,
+        parse=WeatherReading.from_json,
+        refresh: bool = False,
+    ):
+        """
+        Serve from the cache, or run fetch() once for all concurrent callers.
+        
+        With refresh=True the memory and disk copies are skipped and the
+        upstream response replaces them.
+        """
+        if not refresh:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        async def load():
+            # A fresh enough copy on disk saves the round trip after a restart
+            stored = None if refresh else await self._read_store(cache_key, parse)
+            if stored is not None and time.time() - stored[1] < Config.CACHE_TTL:
+                reading = stored[0]
+            else:
+                raw = await fetch()
+                reading = self._parse(raw, parse)
+                self._write_store(cache_key, raw)
+            # Only the compact record is cached, not the full payload
+            self.cache.set(cache_key, reading)
+            return reading
+        
+        # A refresh must not join a load that may be answered from disk
+        flight_key = (cache_key, "refresh") if refresh else cache_key
+        return await self._inflight.do(flight_key, load)
+    
+    @staticmethod
+    def _parse(raw: Union[bytes, str], parse=WeatherReading.from_json):
+        """Decode a response body into a record (a WeatherReading by default)."""
+        try:
+            return parse(raw)
+        except Exception as e:
+            raise WeatherServiceError(f"Invalid response from weather service: {e}")
+    
+    async def _read_store(
+        self,
+        cache_key: tuple,
+        parse=WeatherReading.from_json,
+    ) -> Optional[Tuple[WeatherReading, float]]:
+        """Read and parse a stored payload off the event loop."""
+        if self.store is None:
+            return None
+        try:
+            stored = await asyncio.to_thread(self.store.get, cache_key)
+            if stored is None:
+                return None
+            return parse(stored[0]), stored[1]
+        except Exception as e:
+            print(f"Error reading weather cache: {e}", file=sys.stderr)
+            return None
+    
+    def _write_store(self, cache_key: tuple, raw: bytes):
+        """Persist a payload in the background without delaying the caller."""
+        self._in_background(self.store.put if self.store else None, cache_key, raw)
+    
+    def _in_background(self, func, *args):
+        """Run a blocking store call off the event loop, tracked for aclose()."""
+        if func is None:
+            return
+        
+        async def write():
+            try:
+                await asyncio.to_thread(func, *args)
+            except Exception as e:
+                print(f"Error saving weather cache: {e}", file=sys.stderr)
+        
+        task = asyncio.ensure_future(write())
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+    
+    async def resolve_city_ids(self, cities: Iterable[str]) -> Dict[str, int]:
+        """
+        Return the known OpenWeatherMap IDs for city names.
+        
+        IDs are learned from earlier responses (or remember_city_id) and
+        persisted, so a name is only ever looked up by name once.
+        
+        Args:
+            cities: City names as typed
+            
+        Returns:
+            Mapping of the names with a known ID to that ID
+        """
+        names = {city: self.normalize_city(city) for city in cities}
+        unknown = [name for name in set(names.values()) if name not in self._city_ids]
+        if unknown and self.store is not None:
+            try:
+                stored = await asyncio.to_thread(self.store.get_city_ids, unknown)
+            except Exception as e:
+                print(f"Error reading weather cache: {e}", file=sys.stderr)
+                stored = {}
+            for name in unknown:
+                # 0 marks names that have no stored ID yet
+                self._city_ids[name] = stored.get(name, 0)
+        return {
+            city: self._city_ids[name]
+            for city, name in names.items()
+            if self._city_ids.get(name)
+        }
+    
+    def remember_city_id(self, city: str, city_id: int):
+        """Use city_id for future lookups of this name (and persist it)."""
+        name = self.normalize_city(city)
+        if not city_id or self._city_ids.get(name) == city_id:
+            return
+        self._city_ids[name] = city_id
+        self._in_background(
+            self.store.put_city_id if self.store else None, name, city_id
+        )
     
-    async def get_weather(self, city: str) -> Dict:
+    async def get_cached_weather(
+        self,
+        city: str,
+    ) -> Optional[Tuple[WeatherReading, float]]:
+        """
+        Return the last known weather for a city from the on-disk store.
+        
+        The entry is returned regardless of its age, so callers can render
+        it immediately and refresh in the background.
+        
+        Args:
+            city: Name of the city
+            
+        Returns:
+            (reading, fetched_at) with fetched_at as a Unix timestamp,
+            or None if the city was never fetched
+        """
+        if not city:
+            return None
+        return await self._read_store(self.city_cache_key(city))
+    
+    async def get_weather(self, city: str, refresh: bool = False) -> WeatherReading:
         """
         Fetch weather data for a given city.
         
         Args:
             city: Name of the city
+            refresh: Bypass the cached copies and ask the API again
             
         Returns:
-            Dictionary containing weather data
+            WeatherReading parsed from the API response
             
         Raises:
             WeatherServiceError: If the request fails
@@ -34,41 +304,307 @@ class WeatherService:
         if not city:
             raise WeatherServiceError("City name cannot be empty")
         
+        async def fetch():
+            # Query by ID once the name has been resolved: unambiguous and
+            # cheaper for the API than a name search
+            city_id = (await self.resolve_city_ids([city])).get(city)
+            if city_id:
+                return await self._fetch_city_id(city_id, city)
+            return await self._fetch_city(city)
+        
+        # Serve repeated searches from the cache and share concurrent ones
+        reading = await self._lookup(self.city_cache_key(city), fetch, refresh=refresh)
+        self.remember_city_id(city, reading.city_id)
+        return reading
+    
+    async def get_weather_by_id(self, city_id: int, refresh: bool = False) -> WeatherReading:
+        """
+        Fetch weather data by OpenWeatherMap city ID.
+        
+        Args:
+            city_id: City ID, e.g. from the OWM city list
+            refresh: Bypass the cached copies and ask the API again
+            
+        Returns:
+            WeatherReading parsed from the API response
+            
+        Raises:
+            WeatherServiceError: If the request fails
+        """
+        return await self._lookup(
+            self.city_id_cache_key(city_id),
+            lambda: self._fetch_city_id(city_id, f"#{city_id}"),
+            refresh=refresh,
+        )
+    
+    async def get_weather_group(self, city_ids: Iterable[int]) -> Dict[int, WeatherReading]:
+        """
+        Fetch weather data for many city IDs with few requests.
+        
+        Cached IDs are served from memory; the rest are requested from the
+        group endpoint, Config.GROUP_SIZE IDs per request.
+        
+        Args:
+            city_ids: OpenWeatherMap city IDs
+            
+        Returns:
+            Mapping of city ID to reading; IDs unknown to the API are missing
+            
+        Raises:
+            WeatherServiceError: If a request fails
+        """
+        results = {}
+        missing = []
+        for city_id in dict.fromkeys(city_ids):
+            cached = self.cache.get(self.city_id_cache_key(city_id))
+            if cached is not None:
+                results[city_id] = cached
+            else:
+                missing.append(city_id)
+        
+        chunks = [
+            missing[start:start + Config.GROUP_SIZE]
+            for start in range(0, len(missing), Config.GROUP_SIZE)
+        ]
+        for readings in await asyncio.gather(*(self._fetch_group(c) for c in chunks)):
+            results.update(readings)
+        return results
+    
+    async def get_weather_many(
+        self,
+        cities: Iterable[str],
+        concurrency: Optional[int] = None,
+    ) -> AsyncIterator[
+        Tuple[str, Optional[WeatherReading], Optional[WeatherServiceError]]
+    ]:
+        """
+        Fetch weather data for many cities concurrently.
+        
+        Results are yielded as soon as each lookup finishes, so the order
+        follows completion rather than the input. A failing city does not
+        abort the batch; its error is reported in the yielded tuple. Cities
+        whose ID is already known are fetched through the group endpoint,
+        Config.GROUP_SIZE per request.
+        
+        Args:
+            cities: City names to look up
+            concurrency: Maximum number of lookups in flight at once
+                (defaults to Config.MAX_CONNECTIONS, the pool size)
+            
+        Yields:
+            (city, reading, error) tuples where exactly one of reading/error
+            is set
+        """
+        semaphore = asyncio.Semaphore(concurrency or Config.MAX_CONNECTIONS)
+        cities = list(cities)
+        
+        # Cached cities are answered straight away; cities with a known ID
+        # share group requests; the rest are looked up one by one
+        pending = []
+        for city in cities:
+            cached = self.cache.get(self.city_cache_key(city)) if city else None
+            if cached is not None:
+                yield city, cached, None
+            else:
+                pending.append(city)
+        city_ids = await self.resolve_city_ids(c for c in pending if c)
+        by_id: Dict[int, List[str]] = {}
+        single = []
+        for city in pending:
+            if city in city_ids:
+                by_id.setdefault(city_ids[city], []).append(city)
+            else:
+                single.append(city)
+        
+        async def fetch_one(city: str):
+            async with semaphore:
+                try:
+                    return [(city, await self.get_weather(city), None)]
+                except WeatherServiceError as e:
+                    return [(city, None, e)]
+        
+        async def fetch_group(ids: List[int]):
+            async with semaphore:
+                try:
+                    readings = await self._fetch_group(ids)
+                except WeatherServiceError as e:
+                    return [(city, None, e) for i in ids for city in by_id[i]]
+            results = []
+            for i in ids:
+                for city in by_id[i]:
+                    reading = readings.get(i)
+                    if reading is None:
+                        error = WeatherServiceError(
+                            f"City '{city}' not found. Please check the spelling."
+                        )
+                        results.append((city, None, error))
+                    else:
+                        self.cache.set(self.city_cache_key(city), reading)
+                        results.append((city, reading, None))
+            return results
+        
+        ids = list(by_id)
+        tasks = [
+            asyncio.ensure_future(fetch_group(ids[start:start + Config.GROUP_SIZE]))
+            for start in range(0, len(ids), Config.GROUP_SIZE)
+        ]
+        tasks.extend(asyncio.ensure_future(fetch_one(city)) for city in single)
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for result in await next_done:
+                    yield result
+        finally:
+            # Stop outstanding lookups if the caller stops iterating early
+            for task in tasks:
+                task.cancel()
+    
+    async def _send(self, params: Dict, url: Optional[str] = None) -> httpx.Response:
+        """
+        GET the API (self.base_url unless url is given) with retries and
+        the circuit breaker.
+        
+        Timeouts, network errors, 429 and 5xx responses are retried up to
+        Config.MAX_RETRIES times with capped, jittered exponential backoff
+        (or the server's Retry-After, if it fits under the cap). The last
+        response is returned, or the last transport error re-raised, once
+        retries run out.
+        
+        Raises:
+            WeatherServiceError: If the circuit breaker is open
+        """
+        if not self.breaker.allow_request():
+            self.metrics.inc("weather_circuit_rejections_total")
+            raise WeatherServiceError(
+                "Weather service is temporarily unavailable. "
+                "Please try again in a moment."
+            )
+        
+        client = self._get_client()
+        attempt = 0
+        while True:
+            delay = backoff_delay(
+                attempt, Config.RETRY_BACKOFF_BASE, Config.RETRY_BACKOFF_MAX
+            )
+            if attempt:
+                self.metrics.inc("weather_upstream_retries_total")
+            started = time.perf_counter()
+            try:
+                response = await client.get(url or self.base_url, params=params)
+            except (httpx.TimeoutException, httpx.NetworkError) as e:
+                self.metrics.inc(
+                    "weather_upstream_errors_total",
+                    type="timeout" if isinstance(e, httpx.TimeoutException) else "network",
+                )
+                self.breaker.record_failure()
+                if attempt >= Config.MAX_RETRIES or not self.breaker.allow_request():
+                    raise
+            else:
+                self.metrics.observe(
+                    "weather_upstream_request_seconds",
+                    time.perf_counter() - started,
+                )
+                status = response.status_code
+                if status == 429:
+                    # Rate limited: the server is healthy, so don't trip the
+                    # breaker, but honour its Retry-After hint
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    if retry_after is not None:
+                        if retry_after > Config.RETRY_BACKOFF_MAX:
+                            return response
+                        delay = retry_after
+                elif status >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                    return response
+                
+                if attempt >= Config.MAX_RETRIES or not self.breaker.allow_request():
+                    return response
+            
+            await asyncio.sleep(delay)
+            attempt += 1
+    
+    async def _fetch_city(self, city: str, url: Optional[str] = None) -> bytes:
+        """Request a city from the API (current weather by default); return the body."""
         # Build request parameters
         params = {
             "q": city,
             "appid": self.api_key,
             "units": Config.UNITS,
         }
+        return await self._fetch_checked(params, city, url)
+    
+    async def _fetch_city_id(
+        self,
+        city_id: int,
+        city: str,
+        url: Optional[str] = None,
+    ) -> bytes:
+        """Request a city by ID (current weather by default); return the body."""
+        params = {
+            "id": city_id,
+            "appid": self.api_key,
+            "units": Config.UNITS,
+        }
+        return await self._fetch_checked(params, city, url)
+    
+    async def _fetch_group(self, city_ids: List[int]) -> Dict[int, WeatherReading]:
+        """Request up to Config.GROUP_SIZE city IDs in one call and cache them."""
+        params = {
+            "id": ",".join(str(city_id) for city_id in city_ids),
+            "appid": self.api_key,
+            "units": Config.UNITS,
+        }
+        raw = await self._fetch_checked(params, f"#{city_ids[0]}", Config.GROUP_URL)
         
+        def parse(body):
+            return [WeatherReading.from_payload(item) for item in loads(body)["list"]]
+        
+        readings = {}
+        for reading in self._parse(raw, parse):
+            readings[reading.city_id] = reading
+            self.cache.set(self.city_id_cache_key(reading.city_id), reading)
+        return readings
+    
+    async def _fetch_checked(
+        self,
+        params: Dict,
+        city: str,
+        url: Optional[str] = None,
+    ) -> bytes:
+        """Send a city request and turn error statuses into WeatherServiceError."""
         try:
-            # Make async HTTP request
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(self.base_url, params=params)
-                
-                # Check for HTTP errors
-                if response.status_code == 404:
-                    raise WeatherServiceError(
-                        f"City '{city}' not found. Please check the spelling."
-                    )
-                elif response.status_code == 401:
-                    raise WeatherServiceError(
-                        "Invalid API key. Please check your configuration."
-                    )
-                elif response.status_code >= 500:
-                    raise WeatherServiceError(
-                        "Weather service is currently unavailable. "
-                        "Please try again later."
-                    )
-                elif response.status_code != 200:
-                    raise WeatherServiceError(
-                        f"Error fetching weather data: {response.status_code}"
-                    )
-                
-                # Parse JSON response
-                data = response.json()
-                return data
-                
+            # Make async HTTP request over the pooled client
+            response = await self._send(params, url)
+            
+            # Check for HTTP errors
+            if response.status_code == 404:
+                raise CityNotFoundError(
+                    f"City '{city}' not found. Please check the spelling."
+                )
+            elif response.status_code == 401:
+                raise WeatherServiceError(
+                    "Invalid API key. Please check your configuration."
+                )
+            elif response.status_code == 429:
+                raise WeatherServiceError(
+                    "Too many requests. Please wait a moment and try again."
+                )
+            elif response.status_code >= 500:
+                raise WeatherServiceError(
+                    "Weather service is currently unavailable. "
+                    "Please try again later."
+                )
+            elif response.status_code != 200:
+                raise WeatherServiceError(
+                    f"Error fetching weather data: {response.status_code}"
+                )
+            
+            # Parsing happens once, in _lookup
+            return response.content
+            
+        except WeatherServiceError:
+            raise
         except httpx.TimeoutException:
             raise WeatherServiceError(
                 "Request timed out. Please check your internet connection."
@@ -86,7 +622,7 @@ class WeatherService:
         self, 
         lat: float, 
         lon: float
-    ) -> Dict:
+    ) -> WeatherReading:
         """
         Fetch weather data by coordinates.
         
@@ -95,20 +631,87 @@ class WeatherService:
             lon: Longitude
             
         Returns:
-            Dictionary containing weather data
+            WeatherReading parsed from the API response
         """
+        return await self._lookup(
+            self.coordinates_cache_key(lat, lon),
+            lambda: self._fetch_coordinates(lat, lon),
+        )
+    
+    async def _fetch_coordinates(
+        self,
+        lat: float,
+        lon: float,
+        url: Optional[str] = None,
+        extra_params: Optional[Dict] = None,
+    ) -> bytes:
+        """Request a coordinate pair (current weather by default); return the body."""
         params = {
             "lat": lat,
             "lon": lon,
             "appid": self.api_key,
             "units": Config.UNITS,
         }
+        if extra_params:
+            params.update(extra_params)
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(self.base_url, params=params)
-                response.raise_for_status()
-                return response.json()
-                
+            response = await self._send(params, url)
+            response.raise_for_status()
+            return response.content
+            
+        except WeatherServiceError:
+            raise
         except Exception as e:
-            raise WeatherServiceError(f"Error fetching weather data: {str(e)}")
\ No newline at end of file
+            raise WeatherServiceError(f"Error fetching weather data: {str(e)}")
+    
+    async def get_forecast(self, city: str):
+        """
+        Fetch the 5 day / 3 hour forecast for a city.
+        
+        Args:
+            city: Name of the city
+            
+        Returns:
+            ForecastSeries with columnar NumPy arrays (see forecast.py)
+            
+        Raises:
+            WeatherServiceError: If the request fails
+        """
+        # Imported here so current-weather lookups don't pay for NumPy
+        from forecast import ForecastSeries
+        
+        if not city:
+            raise WeatherServiceError("City name cannot be empty")
+        
+        cache_key = ("forecast",) + self.city_cache_key(city)[1:]
+        return await self._lookup(
+            cache_key,
+            lambda: self._fetch_city(city, Config.FORECAST_URL),
+            ForecastSeries.from_forecast_json,
+        )
+    
+    async def get_hourly_forecast(self, lat: float, lon: float):
+        """
+        Fetch the hourly forecast (next 48 hours) from the One Call API.
+        
+        Args:
+            lat: Latitude
+            lon: Longitude
+            
+        Returns:
+            ForecastSeries with columnar NumPy arrays (see forecast.py)
+            
+        Raises:
+            WeatherServiceError: If the request fails
+        """
+        from forecast import ForecastSeries
+        
+        cache_key = ("hourly",) + self.coordinates_cache_key(lat, lon)[1:]
+        return await self._lookup(
+            cache_key,
+            lambda: self._fetch_coordinates(lat, lon, Config.ONECALL_URL, {
+                "exclude": "current,minutely,daily,alerts",
+            }),
+            ForecastSeries.from_onecall_json,
+        )
@@ -0,0 +1,121 @@
+# weather_store.py
+"""Persistent SQLite store of the last known weather per lookup, and of
+the city IDs that names resolved to."""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Hashable, Iterable, Optional, Tuple, Union
+
+
+class WeatherStore:
+    """Keeps the last raw API payload and its fetch time for each cache key."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS weather (
+                    key TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS locations (
+                    name TEXT PRIMARY KEY,
+                    city_id INTEGER NOT NULL,
+                    resolved_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _encode_key(key: Hashable) -> str:
+        """Turn a service cache key tuple into a stable text key."""
+        return json.dumps(list(key) if isinstance(key, tuple) else key)
+
+    def get(self, key: Hashable) -> Optional[Tuple[str, float]]:
+        """
+        Load the last stored payload for a key.
+
+        Args:
+            key: Service cache key
+
+        Returns:
+            (raw JSON payload, fetched_at) with fetched_at as a Unix
+            timestamp, or None if nothing is stored
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, fetched_at FROM weather WHERE key = ?",
+                (self._encode_key(key),),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1]
+
+    def put(
+        self,
+        key: Hashable,
+        payload: Union[bytes, str],
+        fetched_at: Optional[float] = None,
+    ):
+        """Store (or replace) the raw JSON payload for a key."""
+        if fetched_at is None:
+            fetched_at = time.time()
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO weather (key, payload, fetched_at) "
+                "VALUES (?, ?, ?)",
+                (self._encode_key(key), payload, fetched_at),
+            )
+            self._conn.commit()
+
+    def get_city_ids(self, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Look up the city IDs stored for normalized city names.
+
+        Args:
+            names: Normalized names (see WeatherService.normalize_city)
+
+        Returns:
+            Mapping of the names that have an ID to that ID
+        """
+        names = list(names)
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's limit on bound parameters
+            for start in range(0, len(names), 500):
+                chunk = names[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT name, city_id FROM locations WHERE name IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_city_id(self, name: str, city_id: int):
+        """Remember the city ID a normalized name resolved to."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO locations (name, city_id, resolved_at) "
+                "VALUES (?, ?, ?)",
+                (name, city_id, time.time()),
+            )
+            self._conn.commit()
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -1,6 +1,15 @@
 import flet as ft
 import re
-from database import update_contact_db, delete_contact_db, add_contact_db, get_all_contacts_db
+from database import (
+    update_contact_db,
+    delete_contact_db,
+    add_contact_db,
+    get_contacts_page_db,
+    search_contacts_page_db,
+)
+
+# Contacts loaded per "Load more" click
+PAGE_SIZE = 50
 
 
 # --- Validation helpers ---
@@ -23,22 +32,45 @@ def validate_email(email: str) -> str | None:
 
 
 # --- Display contacts ---
-def display_contacts(page, contacts_list_view, db_conn):
+def display_contacts(page, contacts_list_view, db_conn, query: str = ""):
+    """Show the first page of contacts (only those matching query, if given)."""
     contacts_list_view.controls.clear()
-    contacts = get_all_contacts_db(db_conn)
+    load_contacts_page(page, contacts_list_view, db_conn, query)
+
+
+def load_contacts_page(page, contacts_list_view, db_conn, query: str = "", after=None):
+    """Append the page of contacts after the (name, id) key `after`."""
+    # The "Load more" button is always last; the new page goes in its place
+    if contacts_list_view.controls and contacts_list_view.controls[-1].data == "load_more":
+        contacts_list_view.controls.pop()
+
+    query = query.strip()
+    if query:
+        contacts = search_contacts_page_db(db_conn, query, after, PAGE_SIZE)
+    else:
+        contacts = get_contacts_page_db(db_conn, after, PAGE_SIZE)
     for contact in contacts:
         add_contact_tile(page, contacts_list_view, db_conn, contact)
+
+    # A full page means there may be more
+    if len(contacts) == PAGE_SIZE:
+        last_id, last_name = contacts[-1][0], contacts[-1][1]
+        contacts_list_view.controls.append(
+            ft.TextButton(
+                "Load more",
+                icon=ft.Icons.EXPAND_MORE,
+                data="load_more",
+                on_click=lambda e: load_contacts_page(
+                    page, contacts_list_view, db_conn, query, (last_name, last_id)
+                ),
+            )
+        )
     page.update()
 
 
 def search_contacts(page, contacts_list_view, db_conn, query: str):
     """Filter contacts by name, phone, or email."""
-    contacts_list_view.controls.clear()
-    contacts = get_all_contacts_db(db_conn)
-    for contact in contacts:
-        if query.lower() in " ".join(map(str, contact[1:])).lower():
-            add_contact_tile(page, contacts_list_view, db_conn, contact)
-    page.update()
+    display_contacts(page, contacts_list_view, db_conn, query)
 
 
 # --- Add contact ---
@@ -15,6 +15,11 @@ def init_db():
         )
     """
     )
+    # Lets the paginated queries walk contacts in (name, id) order
+    # instead of sorting the whole table
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_contacts_name_id ON contacts (name, id)"
+    )
     conn.commit()
     return conn
 
@@ -36,6 +41,44 @@ def get_all_contacts_db(conn):
     return cursor.fetchall()
 
 
+def get_contacts_page_db(conn, after=None, limit=50):
+    """Retrieves up to `limit` contacts ordered by name, then id.
+
+    `after` is the (name, id) of the last contact of the previous page;
+    None starts from the beginning.
+    """
+    cursor = conn.cursor()
+    if after is None:
+        cursor.execute(
+            "SELECT id, name, phone, email FROM contacts ORDER BY name, id LIMIT ?",
+            (limit,),
+        )
+    else:
+        cursor.execute(
+            "SELECT id, name, phone, email FROM contacts "
+            "WHERE (name, id) > (?, ?) ORDER BY name, id LIMIT ?",
+            (after[0], after[1], limit),
+        )
+    return cursor.fetchall()
+
+
+def search_contacts_page_db(conn, query, after=None, limit=50):
+    """Like get_contacts_page_db, but only contacts whose name, phone or
+    email contains `query` (case-insensitive)."""
+    pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    if after is None:
+        after = ("", 0)
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id, name, phone, email FROM contacts "
+        "WHERE (name, id) > (?, ?) "
+        "AND (name LIKE ? ESCAPE '\\' OR phone LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\') "
+        "ORDER BY name, id LIMIT ?",
+        (after[0], after[1], pattern, pattern, pattern, limit),
+    )
+    return cursor.fetchall()
+
+
 def update_contact_db(conn, contact_id, name, phone, email):
     """Updates an existing contact in the database."""
     cursor = conn.cursor()
@@ -19,7 +19,8 @@ def main(page: ft.Page):
     inputs = (name_input, phone_input, email_input)
 
     # --- Contact list ---
-    contacts_list_view = ft.ListView(expand=1, spacing=10, auto_scroll=True)
+    # Sorted by name and loaded a page at a time, so no scrolling to the end
+    contacts_list_view = ft.ListView(expand=1, spacing=10)
 
     # --- Search bar ---
     search_input = ft.TextField(